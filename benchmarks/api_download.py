@@ -0,0 +1,63 @@
+"""Tiempo de descarga de series desde la API de SINCA según la cantidad de
+conexiones simultáneas, contra un servidor local que simula la latencia
+de la API.
+
+Con una sola conexión el tiempo crece con la cantidad de consultas por la
+latencia de cada una; con varias conexiones las consultas se solapan y el
+tiempo queda limitado por el volumen de datos.
+
+Uso: python -m benchmarks.api_download
+"""
+import asyncio
+import tempfile
+from time import perf_counter
+
+from aiohttp import web
+
+from src.data.api import AsyncDatabaseMMA, datetime_to_unix
+
+LATENCY = 0.05
+PAGE_SIZE = 2000
+PAIRS = [(station, par) for station in ['Quintero', 'Ventanas', 'Loncura', 'La Greda'] for par in ['SO2', 'NO2', 'velviento']]
+FROM_DATE, TO_DATE = '2018-01-01', '2023-01-01'
+CONNECTIONS = [1, 4, 16, 32]
+
+
+async def timeserie(request):
+    """Responde páginas de hasta PAGE_SIZE registros horarios, como la API."""
+    await asyncio.sleep(LATENCY)
+    start, end = int(request.match_info['start']), int(request.match_info['end'])
+    stamps = range(start, min(end, start + 3600 * (PAGE_SIZE - 1)) + 1, 3600)
+    return web.json_response({'data': {'timeserie': [{'timestamp': t, 'value': 1.0, 'statusCode': 'V'} for t in stamps]}})
+
+
+async def bench(base_url, max_connections):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        t0 = perf_counter()
+        async with AsyncDatabaseMMA(db_url=base_url, auth_url=None, max_connections=max_connections) as db:
+            timeseries = await db.download(PAIRS, FROM_DATE, TO_DATE, tmp_dir, chunk='180D')
+        elapsed = perf_counter() - t0
+    return elapsed, sum(df.shape[0] for df in timeseries.values())
+
+
+async def main():
+    app = web.Application()
+    app.router.add_get('/domain/SMA/timeserie/{code}/{start}/{end}', timeserie)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f'http://127.0.0.1:{port}'
+
+    n_hours = (datetime_to_unix(TO_DATE) - datetime_to_unix(FROM_DATE)) // 3600
+    print(f'{len(PAIRS)} series de {n_hours} horas, latencia simulada {LATENCY} s')
+    print(f'{"conexiones":>10}\t{"registros":>10}\t{"tiempo [s]":>10}')
+    for max_connections in CONNECTIONS:
+        elapsed, n_rows = await bench(base_url, max_connections)
+        print(f'{max_connections:>10}\t{n_rows:>10}\t{elapsed:>10.3f}')
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Tiempo de la correlación cruzada entre todos los pares de variables de
+una estación: convolución directa con 'np.convolve' por par, como hacía
+'df_convolve', y el cálculo por FFT de 'cross_correlation' para todos los
+pares y desfases a la vez. Se verifica además contra 'shift' + 'corr' de
+pandas en algunos desfases.
+
+Uso: python -m benchmarks.cross_correlation
+"""
+from itertools import combinations
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.data.make_dataset import get_minma_data
+from src.eda.correlation import cross_correlation
+
+STATION = 'quintero'
+PARAMS = ['SO2', 'NO2', 'NO', 'velviento', 'dirviento']
+FROM_LAST = '1826D'
+MAX_LAG = 168
+CHECK_LAGS = [0, 1, 24, -72, MAX_LAG]
+
+
+def direct_convolution(data_df):
+    """Convolución 'same' de cada par normalizado, con NaN reemplazados por
+    0 ya que 'np.convolve' no los admite."""
+    norm_df = ((data_df - data_df.mean()) / data_df.std()).fillna(0)
+    return {(col1, col2): np.convolve(norm_df[col1], norm_df[col2], mode='same')
+            for col1, col2 in combinations(data_df.columns, 2)}
+
+
+def main():
+    data_df = get_minma_data(PARAMS, STATION, from_last=FROM_LAST, n_cols=None, how='outer', layout='coalesced')
+    data_df = data_df[PARAMS]
+    n_pairs = len(PARAMS) * (len(PARAMS) - 1) // 2
+    print(f'{STATION}: {data_df.shape[0]} horas, {len(PARAMS)} variables, {n_pairs} pares')
+
+    t0 = perf_counter()
+    direct_convolution(data_df)
+    direct_time = perf_counter() - t0
+
+    t0 = perf_counter()
+    corr, lags, columns = cross_correlation(data_df, max_lag=MAX_LAG)
+    fft_time = perf_counter() - t0
+
+    grid = data_df.reindex(pd.date_range(data_df.index[0], data_df.index[-1], freq=pd.Timedelta(hours=1)))
+    max_error = max(abs(grid[col1].corr(grid[col2].shift(-lag)) - corr[i, j, lag + MAX_LAG])
+                    for (i, col1), (j, col2) in combinations(enumerate(columns), 2) for lag in CHECK_LAGS)
+    print(f'{"método":>24}\t{"tiempo [s]":>10}')
+    print(f'{"np.convolve por par":>24}\t{direct_time:>10.3f}')
+    print(f'{"FFT, todos los pares":>24}\t{fft_time:>10.3f}\t({lags.size} desfases, '
+          f'error máximo vs pandas {max_error:.1e})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Tiempo de 'daily_stats' con el recorrido por día con 'describe' y con el
+cálculo vectorizado de 'aggregate_days', sobre la historia completa de
+una estación. La comparación con 'describe' considera solo las columnas
+lineales, ya que en las de dirección el promedio y la desviación son
+circulares.
+
+Uso: python -m benchmarks.daily_stats
+"""
+from time import perf_counter
+
+import numpy as np
+
+from src.data.make_dataset import get_minma_data
+from src.eda.circular import is_direction_column
+from src.eda.processing import aggregate_days, daily_stats, daily_tensor, iter_days
+
+STATION = 'maitenes'
+PARAMS = ['SO2', 'NO2', 'NO', 'velviento', 'dirviento']
+STATS = ['min', 'max', 'mean', 'std', 'count', '25%', 'median', '75%', 'circmean']
+REPEATS = 3
+
+
+def describe_loop(day_list):
+    return np.array([df.describe().loc[['min', 'max', 'mean', 'std']].values for df in day_list])
+
+
+def bench(function, *args):
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        result = function(*args)
+        timings.append(perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+    data_df = get_minma_data(PARAMS, STATION, n_cols=None, how='outer', layout='coalesced')
+    data_df = data_df[PARAMS]
+    day_list = list(iter_days(data_df))
+    tensor = daily_tensor(data_df, dtype=np.float64)[0]
+    print(f'{STATION}: {len(day_list)} días x {len(PARAMS)} variables')
+
+    base, expected = bench(describe_loop, day_list)
+    linear = [not is_direction_column(param) for param in PARAMS]
+    cases = [
+        ('describe por día', base, expected),
+        ('lista de días', *bench(daily_stats, day_list)),
+        ('DataFrame horario', *bench(daily_stats, data_df)),
+        ('arreglo (día, hora, var)', *bench(daily_stats, tensor)),
+    ]
+    print(f'{"entrada":>26}\t{"tiempo [s]":>10}\t{"aceleración":>11}\t{"iguales":>7}')
+    for name, elapsed, result in cases:
+        same = np.allclose(result[..., linear], expected[..., linear], equal_nan=True)
+        print(f'{name:>26}\t{elapsed:>10.4f}\t{base / elapsed:>10.0f}x\t{str(same):>7}')
+    elapsed, _ = bench(aggregate_days, data_df, STATS)
+    print(f'{len(STATS)} estadísticos con aggregate_days: {elapsed:.4f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Tiempo de detección de episodios de SO2 sobre varios umbrales en todas
+las estaciones de la red, comparado con recorrer las horas una a una.
+
+Uso: python -m benchmarks.episodes
+"""
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.data.make_dataset import get_multi_station_data
+from src.eda.episodes import duration_stats, station_episodes
+
+STATIONS = ['quintero', 'maitenes', 'ventanas']
+THRESHOLDS = [50, 133, 350]
+MAX_GAP = 1
+REPEATS = 3
+
+
+def loop_episodes(series, threshold, max_gap):
+    """Versión de referencia que recorre la serie hora a hora."""
+    episodes, current, last = [], None, None
+    for stamp, value in series.dropna().items():
+        if value <= threshold:
+            continue
+        if current is not None and (stamp - last) <= pd.Timedelta(hours=max_gap + 1):
+            current['peak'] = max(current['peak'], value)
+            current['hours'] += 1
+        else:
+            current = {'start': stamp, 'peak': value, 'hours': 1}
+            episodes.append(current)
+        current['end'], last = stamp, stamp
+    return episodes
+
+
+def main():
+    data_df = get_multi_station_data(STATIONS, ['SO2'], max_workers=1, layout='coalesced')
+    print(f'{len(STATIONS)} estaciones, {data_df.shape[0]} horas, umbrales {THRESHOLDS}')
+
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        episodes = station_episodes(data_df, 'SO2', THRESHOLDS, MAX_GAP)
+        stats = duration_stats(episodes)
+        timings.append(perf_counter() - t0)
+    print(stats.round(2).to_string())
+
+    t0 = perf_counter()
+    reference = {(station, threshold): loop_episodes(data_df[(station, 'SO2')], threshold, MAX_GAP)
+                 for station in STATIONS for threshold in THRESHOLDS}
+    loop_time = perf_counter() - t0
+    same = all(
+        np.array_equal(group['peak'].to_numpy(), [episode['peak'] for episode in reference[key]])
+        and np.array_equal(group['hours'].to_numpy(), [episode['hours'] for episode in reference[key]])
+        for key, group in episodes.groupby(['station', 'threshold'])
+    ) and len(episodes) == sum(map(len, reference.values()))
+    print(f'{"método":>10}\t{"tiempo [s]":>10}')
+    print(f'{"por hora":>10}\t{loop_time:>10.3f}')
+    print(f'{"rachas":>10}\t{min(timings):>10.3f}\t(iguales: {same})')
+
+
+if __name__ == '__main__':
+    main()
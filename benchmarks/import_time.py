@@ -0,0 +1,63 @@
+"""Tiempo de importación de los módulos de cálculo, medido con
+'python -X importtime' en un proceso nuevo, como al iniciar un worker.
+
+Falla si la importación supera el presupuesto o si carga alguna de las
+librerías de graficación o modelos, que solo deben importarse al usarse.
+
+Uso: python -m benchmarks.import_time
+"""
+import re
+import subprocess
+import sys
+
+from src.utils import get_project_root
+
+WORKER_MODULES = ['src.data.make_dataset', 'src.data.cube', 'src.data.store', 'src.eda.processing',
+                  'src.eda.correlation', 'src.eda.quantiles', 'src.models.clustering']
+PLOTTING_MODULES = ['src.eda.visualization', 'src.eda.trends', 'src.visualization.clustering']
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'scipy', 'sklearn', 'tslearn']
+BUDGET_S = 1.0
+REPEATS = 5
+
+
+def import_profile(modules):
+    """Importa 'modules' en un proceso nuevo y entrega el tiempo total en
+    segundos y los nombres de todos los módulos cargados."""
+    code = '; '.join(f'import {module}' for module in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=get_project_root(), check=True)
+    total, loaded = 0, set()
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+        if match:
+            loaded.add(match.group(3))
+            # Solo los módulos de primer nivel, ya que el tiempo es acumulado.
+            if len(match.group(2)) == 1:
+                total += int(match.group(1)) / 1e6
+    return total, loaded
+
+
+def best_profile(modules):
+    return min((import_profile(modules) for _ in range(REPEATS)), key=lambda profile: profile[0])
+
+
+def main():
+    total, loaded = best_profile(WORKER_MODULES)
+    loaded_heavy = sorted({name.split('.')[0] for name in loaded} & set(HEAVY_MODULES))
+    print(f'{"módulos":>20}\t{"tiempo [s]":>10}')
+    print(f'{"baseline (pandas)":>20}\t{best_profile(["pandas"])[0]:>10.3f}')
+    print(f'{"cálculo":>20}\t{total:>10.3f}\t(presupuesto {BUDGET_S} s)')
+    print(f'{"gráficos":>20}\t{best_profile(PLOTTING_MODULES)[0]:>10.3f}')
+
+    failures = []
+    if total > BUDGET_S:
+        failures.append(f'la importación tarda {total:.3f} s, sobre el presupuesto de {BUDGET_S} s')
+    if loaded_heavy:
+        failures.append(f'se importan {loaded_heavy} al cargar los módulos de cálculo')
+    for failure in failures:
+        print(f'ERROR: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
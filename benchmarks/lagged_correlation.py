@@ -0,0 +1,52 @@
+"""Tiempo de las matrices de correlación para desfases de 0 a MAX_LAG
+horas, desplazando las columnas con 'shift' y llamando a 'corr' en cada
+desfase, y con los productos de matrices de 'lagged_correlation'. Se
+incluye el tiempo de los intervalos por bootstrap de bloques.
+
+Uso: python -m benchmarks.lagged_correlation
+"""
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.data.make_dataset import get_minma_data
+from src.eda.correlation import correlation_intervals, lagged_correlation
+
+STATION = 'quintero'
+PARAMS = ['SO2', 'NO2', 'NO', 'NOX', 'O3', 'CO', 'MP10', 'velviento', 'dirviento']
+FROM_LAST = '1826D'
+MAX_LAG = 48
+N_BOOT = 500
+
+
+def shift_corr(data_df, method):
+    """Versión de referencia: un 'corr' de pandas por desfase."""
+    grid = data_df.reindex(pd.date_range(data_df.index[0], data_df.index[-1], freq=pd.Timedelta(hours=1)))
+    n_vars = grid.shape[1]
+    return np.stack([pd.concat([grid, grid.shift(-lag).add_suffix('_lag')], axis=1).corr(method=method)
+                     .to_numpy()[:n_vars, n_vars:] for lag in range(MAX_LAG + 1)])
+
+
+def timed(function, *args, **kwargs):
+    t0 = perf_counter()
+    result = function(*args, **kwargs)
+    return perf_counter() - t0, result
+
+
+def main():
+    data_df = get_minma_data(PARAMS, STATION, from_last=FROM_LAST, n_cols=None, how='outer', layout='coalesced')
+    data_df = data_df[PARAMS]
+    print(f'{STATION}: {data_df.shape[0]} horas, {len(PARAMS)} variables, desfases 0 a {MAX_LAG}')
+    print(f'{"método":>10}\t{"shift+corr [s]":>14}\t{"matricial [s]":>13}\t{"aceleración":>11}\t{"dif. máx.":>9}')
+    for method in ['pearson', 'spearman']:
+        loop_time, expected = timed(shift_corr, data_df, method)
+        batch_time, (corr, _, _) = timed(lagged_correlation, data_df, max_lag=MAX_LAG, method=method)
+        error = np.nanmax(np.abs(corr - expected))
+        print(f'{method:>10}\t{loop_time:>14.3f}\t{batch_time:>13.3f}\t{loop_time / batch_time:>10.0f}x\t{error:>9.1e}')
+    boot_time, _ = timed(correlation_intervals, data_df, max_lag=MAX_LAG, n_boot=N_BOOT, random_state=0)
+    print(f'intervalos con {N_BOOT} réplicas de bootstrap: {boot_time:.3f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Observaciones por segundo del monitor de superaciones al reprocesar la
+historia de SO2 de la red, hora a hora con 'update' y de una vez con
+'replay', verificando que ambos entreguen los mismos eventos. 'update' es
+Python puro y queda bajo el millón de observaciones por segundo; solo
+'replay' lo supera. También se comprueba que una hora igual al límite no
+genere eventos.
+
+Uso: python -m benchmarks.monitor_replay
+"""
+from time import perf_counter
+
+import pandas as pd
+
+from src.data.make_dataset import get_minma_data
+from src.eda.monitor import ExceedanceMonitor, events_to_frame
+
+STATIONS = ['quintero', 'maitenes', 'ventanas']
+# Límites de referencia en ppb para el valor horario, la media móvil de 3
+# horas y la media de 24 horas.
+LIMITS = {1: 350, 3: 250, 24: 125}
+REPEATS = 3
+
+
+def run_updates(series, station):
+    monitor = ExceedanceMonitor(LIMITS, station)
+    events = []
+    for time, value in series.items():
+        events.extend(monitor.update(time, value))
+    return events
+
+
+def run_replay(series, station):
+    return ExceedanceMonitor(LIMITS, station).replay(series)
+
+
+def check_limit_equality():
+    """Una hora igual al límite no supera el límite, con ambos métodos."""
+    limit = LIMITS[1]
+    series = pd.Series([0.0, limit, 0.0, limit + 1, 0.0],
+                       index=pd.date_range('2020-01-01', periods=5, freq=pd.Timedelta(hours=1)))
+    monitor = ExceedanceMonitor({1: limit})
+    update_events = [event for time, value in series.items() for event in monitor.update(time, value)]
+    replay_events = ExceedanceMonitor({1: limit}).replay(series)
+    for events in [update_events, replay_events]:
+        assert [(event['event'], event['time']) for event in events] == \
+            [('start', series.index[3]), ('end', series.index[4])], 'una hora igual al límite generó un evento'
+
+
+def bench(function, series_by_station):
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        events = [event for station, series in series_by_station.items() for event in function(series, station)]
+        timings.append(perf_counter() - t0)
+    return min(timings), events_to_frame(events)
+
+
+def main():
+    check_limit_equality()
+    series_by_station = {station: get_minma_data(['SO2'], station, n_cols=None, layout='coalesced')['SO2']
+                         for station in STATIONS}
+    n_obs = sum(series.shape[0] for series in series_by_station.values())
+    print(f'{len(STATIONS)} estaciones, {n_obs} observaciones, límites {LIMITS}')
+
+    update_time, update_events = bench(run_updates, series_by_station)
+    replay_time, replay_events = bench(run_replay, series_by_station)
+    same = update_events.drop(columns='value').equals(replay_events.drop(columns='value'))
+    print(f'{"método":>8}\t{"tiempo [s]":>10}\t{"obs/s":>12}\t{"eventos":>7}')
+    print(f'{"update":>8}\t{update_time:>10.3f}\t{n_obs / update_time:>12,.0f}\t{len(update_events):>7}')
+    print(f'{"replay":>8}\t{replay_time:>10.3f}\t{n_obs / replay_time:>12,.0f}\t{len(replay_events):>7}')
+    print(f'mismos eventos: {same}')
+    print('una hora igual al límite no genera eventos')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Tiempo y memoria máxima al unir muchos parámetros de una estación.
+
+Compara la cadena de pd.merge de a pares que usaba get_minma_data con
+join_params, que ubica todos los parámetros en un único arreglo.
+
+Uso: python -m benchmarks.param_join
+"""
+import tracemalloc
+from functools import reduce
+from time import perf_counter
+
+import pandas as pd
+
+from src.data.cube import list_raw_files
+from src.data.make_dataset import join_params, read_minma_file
+
+STATION = 'concon'
+REPEATS = 3
+
+
+def merge_chain(param_df_list):
+    return reduce(lambda left, right: pd.merge(left, right, left_index=True, right_index=True), param_df_list)
+
+
+def measure(join, param_df_list):
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        join(param_df_list)
+        timings.append(perf_counter() - t0)
+    tracemalloc.start()
+    join(param_df_list)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1024 ** 2
+
+
+def main():
+    params = list_raw_files()[STATION]
+    param_df_list = [read_minma_file(STATION, param, None) for param in params]
+    print(f'{STATION}: {len(params)} parámetros')
+    print(f'{"método":>22}\t{"tiempo [s]":>10}\t{"peak [MB]":>10}')
+    for name, join in [('reduce(pd.merge)', merge_chain),
+                       ("join_params('inner')", lambda dfs: join_params(dfs, 'inner')),
+                       ("join_params('outer')", lambda dfs: join_params(dfs, 'outer')),
+                       ("join_params('grid')", lambda dfs: join_params(dfs, 'grid'))]:
+        elapsed, peak = measure(join, param_df_list)
+        print(f'{name:>22}\t{elapsed:>10.4f}\t{peak:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
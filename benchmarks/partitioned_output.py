@@ -0,0 +1,76 @@
+"""Tamaño y tiempo de carga del dataset procesado como pickle y como
+Parquet particionado por estación y año.
+
+El pickle se debe cargar completo aunque solo se necesite una columna o
+un año; el dataset particionado lee solo las columnas y particiones que
+se piden. Al final se comprueba que reescribir la estación con un período
+más corto no deja años de la escritura anterior.
+
+Uso: python -m benchmarks.partitioned_output
+"""
+import os
+import tempfile
+from time import perf_counter
+
+import pandas as pd
+
+from src.data.make_dataset import get_minma_data
+from src.data.store import read_partitioned, write_partitioned
+
+STATION = 'quintero'
+PARAMS = ['SO2', 'NO', 'NO2', 'NOX', 'O3', 'CO', 'MP10', 'MP25', 'velviento', 'dirviento']
+REPEATS = 5
+
+
+def dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def bench(load):
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        data_df = load()
+        timings.append(perf_counter() - t0)
+    return min(timings), data_df.shape
+
+
+def main():
+    dataset = get_minma_data(PARAMS, STATION, n_cols=None, how='outer')
+    last_year = dataset.index[-1].year
+    column = dataset.columns[0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_path = os.path.join(tmp_dir, f'{STATION}.pkl')
+        parquet_path = os.path.join(tmp_dir, STATION)
+        dataset.to_pickle(pickle_path)
+        write_partitioned(dataset, parquet_path, STATION)
+
+        print(f'{STATION}: {dataset.shape[0]} filas x {dataset.shape[1]} columnas')
+        print(f'{"formato":>8}\t{"tamaño [MB]":>11}')
+        print(f'{"pickle":>8}\t{dir_size(pickle_path) / 2 ** 20:>11.1f}')
+        print(f'{"parquet":>8}\t{dir_size(parquet_path) / 2 ** 20:>11.1f}')
+
+        cases = [
+            ('todo', 'pickle', lambda: pd.read_pickle(pickle_path)),
+            ('todo', 'parquet', lambda: read_partitioned(parquet_path, STATION)),
+            ('1 col, 1 año', 'pickle',
+             lambda: pd.read_pickle(pickle_path).loc[str(last_year), [column]]),
+            ('1 col, 1 año', 'parquet',
+             lambda: read_partitioned(parquet_path, STATION, [column], f'{last_year}-01-01', f'{last_year}-12-31 23:00')),
+        ]
+        print(f'{"consulta":>14}\t{"formato":>8}\t{"forma":>14}\t{"tiempo [s]":>10}')
+        for query, fmt, load in cases:
+            elapsed, shape = bench(load)
+            print(f'{query:>14}\t{fmt:>8}\t{str(shape):>14}\t{elapsed:>10.4f}')
+
+        last_days = dataset.loc[dataset.index[-1] - pd.Timedelta('365D'):]
+        write_partitioned(last_days, parquet_path, STATION)
+        rewritten = read_partitioned(parquet_path, STATION)
+        print(f'reescritura con 365 días: {rewritten.shape[0]} filas leídas de {last_days.shape[0]} escritas')
+        assert rewritten.shape[0] == last_days.shape[0], 'la reescritura dejó particiones anteriores'
+
+
+if __name__ == '__main__':
+    main()
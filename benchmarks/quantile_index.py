@@ -0,0 +1,143 @@
+"""Distribuciones acumuladas por hora: las ECDF de cada (hora, columna)
+filtrando y ordenando cada grupo por separado, como antes, contra el
+'QuantileIndex' que ordena todos los grupos a la vez, para el SO2 de una
+estación y para todas las columnas de varias estaciones; el gráfico de
+'cumdistr_comparacion_horaria' con render incluido; cuantiles por hora con
+'groupby' contra el índice; y el error de los resúmenes 'SketchIndex'
+construidos por bloques en varias estaciones y combinados, contra los
+cuantiles exactos.
+
+Uso: python -m benchmarks.quantile_index
+"""
+from time import perf_counter
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from src.data.make_dataset import get_minma_data, get_multi_station_data, iter_minma_data
+from src.eda import visualization
+from src.eda.quantiles import QuantileIndex, SketchIndex
+
+STATIONS = ['quintero', 'maitenes', 'ventanas']
+COL = 'SO2'
+QUANTILES = np.linspace(0.01, 0.99, 99)
+REPEATS = 3
+
+
+def render_and_close():
+    for number in plt.get_fignums():
+        plt.figure(number).canvas.draw()
+    plt.close('all')
+
+
+def legacy_comparacion_horaria(df1, df2, column):
+    """Versión de referencia: filtra y ordena cada hora por separado."""
+    fig, axes = plt.subplots(6, 4, figsize=(20, 30))
+    for idx, ax in enumerate(axes.ravel()):
+        sns.ecdfplot(df1.loc[df1.hour == idx, column], ax=ax)
+        sns.ecdfplot(df2.loc[df2.hour == idx, column], ax=ax)
+        ax.legend(['primera mitad', 'segunda mitad'])
+    plt.tight_layout()
+    render_and_close()
+
+
+def index_comparacion_horaria(df1, df2, column):
+    visualization.cumdistr_comparacion_horaria(df1, df2, 'primera mitad', 'segunda mitad', column)
+    render_and_close()
+
+
+def legacy_ecdfs(frames, columns):
+    curves = []
+    for df in frames:
+        for idx in range(24):
+            for column in columns:
+                values = np.sort(df.loc[df.hour == idx, column].dropna().to_numpy())
+                curves.append((values, np.arange(1, values.size + 1) / values.size))
+    return curves
+
+
+def index_ecdfs(frames, columns):
+    indexes = [QuantileIndex.from_frame(df, 'hour', columns, groups=range(24)) for df in frames]
+    return [index.ecdf(idx, column) for index in indexes for idx in range(24) for column in columns]
+
+
+def compare_ecdfs(label, frames, columns):
+    legacy_time, expected = best_time(legacy_ecdfs, frames, columns)
+    index_time, result = best_time(index_ecdfs, frames, columns)
+    equal = all(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]) for a, b in zip(expected, result))
+    print(f'{label:>28}\t{"tiempo [s]":>10}')
+    print(f'{"filtro y orden por grupo":>28}\t{legacy_time:>10.3f}')
+    print(f'{"QuantileIndex":>28}\t{index_time:>10.3f}\t(iguales: {equal})')
+
+
+def best_time(function, *args):
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        result = function(*args)
+        timings.append(perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+    data_df = get_minma_data([COL], STATIONS[0], n_cols=None, layout='coalesced')[[COL]]
+    data_df['hour'] = data_df.index.hour
+    half = data_df.shape[0] // 2
+    df1, df2 = data_df.iloc[:half], data_df.iloc[half:]
+    print(f'{STATIONS[0]} {COL}: {data_df.shape[0]} horas')
+
+    compare_ecdfs(f'{2 * 24} ECDF de {COL}', [df1, df2], [COL])
+
+    network_df = get_multi_station_data(STATIONS, [COL, 'MP10', 'MP25', 'NO', 'NO2', 'NOX', 'O3', 'velviento'], n_cols=None, layout='coalesced')
+    network_df = network_df[[col for col in network_df.columns if not str(col[-1]).endswith('_estado')]]
+    network_df.columns = [' '.join(col) for col in network_df.columns]
+    columns = list(network_df.columns)
+    network_df['hour'] = network_df.index.hour
+    print(f'{len(STATIONS)} estaciones: {network_df.shape[0]} horas, {len(columns)} columnas')
+    compare_ecdfs(f'{24 * len(columns)} ECDF de la red', [network_df], columns)
+
+    # El dibujo completo está dominado por el render de los 24 paneles.
+    legacy_time, _ = best_time(legacy_comparacion_horaria, df1, df2, COL)
+    index_time, _ = best_time(index_comparacion_horaria, df1, df2, COL)
+    print(f'{"gráfico con render":>28}\t{"tiempo [s]":>10}')
+    print(f'{"sns.ecdfplot por hora":>28}\t{legacy_time:>10.3f}')
+    print(f'{"QuantileIndex + step":>28}\t{index_time:>10.3f}')
+
+    groupby_time, expected = best_time(lambda: data_df.groupby('hour')[COL].quantile(QUANTILES).unstack())
+    index_time, result = best_time(lambda: QuantileIndex.from_frame(data_df, 'hour', [COL]).quantiles(QUANTILES))
+    equal = np.allclose(result.to_numpy(), expected.to_numpy(), equal_nan=True)
+    print(f'{"99 cuantiles por hora":>28}\t{"tiempo [s]":>10}')
+    print(f'{"groupby().quantile":>28}\t{groupby_time:>10.3f}')
+    print(f'{"QuantileIndex":>28}\t{index_time:>10.3f}\t(iguales: {equal})')
+
+    # Un resumen por estación construido por bloques de 90 días y luego
+    # combinados, contra los cuantiles exactos de todas las estaciones.
+    t0 = perf_counter()
+    sketches, frames = [], []
+    for station in STATIONS:
+        sketch = SketchIndex(k=256, seed=0)
+        for chunk_df in iter_minma_data([COL], station, chunk='90D', n_cols=None, layout='coalesced'):
+            sketch.update_frame(chunk_df, chunk_df.index.hour, [COL], groups=range(24))
+            frames.append(chunk_df[[COL]].assign(hour=chunk_df.index.hour))
+        sketches.append(sketch)
+    network = sketches[0]
+    for sketch in sketches[1:]:
+        network.merge(sketch)
+    sketch_time = perf_counter() - t0
+
+    exact = QuantileIndex.from_frame(pd.concat(frames), 'hour', [COL], groups=range(24))
+    rank_errors = [np.max(np.abs(exact.cdf(network.quantile(QUANTILES, hour, COL), hour, COL) - QUANTILES))
+                   for hour in range(24)]
+    stored = sum(np.concatenate(sketch.levels).size for sketch in network.sketches.values())
+    print(f'SketchIndex de {len(STATIONS)} estaciones por bloques de 90 días: {sketch_time:.3f} s, '
+          f'{stored} valores guardados para {exact.values.size} registros, '
+          f'error de rango máximo {max(rank_errors):.4f}')
+
+
+if __name__ == '__main__':
+    main()
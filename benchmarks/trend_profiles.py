@@ -0,0 +1,97 @@
+"""Tiempo de dibujo de los gráficos de 'visualizar_trends' para una serie
+horaria de 5 años: una línea de matplotlib por grupo de 'groupby', como
+antes, y las matrices de perfiles dibujadas como una LineCollection por
+panel. Ambos casos incluyen el render completo de la figura con Agg.
+
+Uso: python -m benchmarks.trend_profiles
+"""
+from time import perf_counter
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from src.data.make_dataset import get_minma_data
+from src.eda import trends
+from src.eda.profiles import PROFILE_CACHE
+
+STATION = 'quintero'
+COL = 'SO2'
+FROM_LAST = '1826D'
+REPEATS = 3
+
+
+def render_and_close():
+    for number in plt.get_fignums():
+        plt.figure(number).canvas.draw()
+    plt.close('all')
+
+
+def legacy_trends(df, col):
+    """Versión de referencia: una línea por día, semana y año, sobre la
+    serie completa."""
+    timeseries = df[[col]].copy()
+    timeseries['hour_of_week'] = timeseries.index.dayofweek * 24 + timeseries.index.hour
+    fig, ax = plt.subplots(nrows=2, ncols=3, figsize=[15, 10], sharey=True)
+    for ix, ax_month in enumerate(ax.flatten()):
+        month_df = timeseries[timeseries.index.month == ix + 1]
+        daily_ts = []
+        for _, ts in month_df.groupby(month_df.index.date):
+            daily_ts.append(ts.reset_index()[col])
+            ts.reset_index()[col].plot(alpha=0.1, ax=ax_month, color='C0')
+        pd.concat(daily_ts, axis=1).mean(axis=1).plot(ax=ax_month, color='blue')
+    render_and_close()
+
+    fig, ax = plt.subplots(figsize=[20, 10])
+    weekly_ts = []
+    for _, ts in timeseries.groupby(timeseries.index.to_period('W')):
+        weekly_ts.append(ts.reset_index()[col])
+        ts.reset_index()[col].plot(alpha=0.1, ax=ax, color='C0')
+    pd.concat(weekly_ts, axis=1).mean(axis=1).plot(ax=ax, color='blue')
+    render_and_close()
+
+    fig, ax = plt.subplots(figsize=[20, 10])
+    yearly_ts = []
+    for _, ts in timeseries.groupby(timeseries.index.year):
+        ts = ts.groupby([ts.index.month, ts.index.day]).mean()
+        yearly_ts.append(ts.reset_index()[col])
+        ts.reset_index()[col].plot(alpha=0.1, ax=ax, color='C0')
+    pd.concat(yearly_ts, axis=1).mean(axis=1).plot(ax=ax, color='blue')
+    render_and_close()
+
+
+def profile_trends(df, col):
+    trends.plot_por_mes(df, col, col)
+    trends.plot_por_semana(df, col, col)
+    trends.plot_por_ano(df, col, col)
+
+
+def bench(function, data_df, clear_cache=False):
+    timings = []
+    for _ in range(REPEATS):
+        if clear_cache:
+            PROFILE_CACHE.clear()
+        t0 = perf_counter()
+        function(data_df, COL)
+        timings.append(perf_counter() - t0)
+    return min(timings)
+
+
+def main():
+    # Cada 'plt.show' de los gráficos dibuja y cierra la figura.
+    plt.show = render_and_close
+    data_df = get_minma_data([COL], STATION, from_last=FROM_LAST, n_cols=None, layout='coalesced')
+    print(f'{STATION} {COL}: {data_df.shape[0]} horas, gráficos por mes, semana y año de toda la serie')
+    legacy_time = bench(legacy_trends, data_df)
+    cold_time = bench(profile_trends, data_df, clear_cache=True)
+    warm_time = bench(profile_trends, data_df)
+    print(f'{"método":>28}\t{"tiempo [s]":>10}')
+    print(f'{"una línea por grupo":>28}\t{legacy_time:>10.3f}')
+    print(f'{"LineCollection":>28}\t{cold_time:>10.3f}')
+    print(f'{"LineCollection, en caché":>28}\t{warm_time:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
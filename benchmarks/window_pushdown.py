@@ -0,0 +1,38 @@
+"""Latencia de get_minma_data según el largo de la ventana 'from_last'.
+
+Con el índice de filas, una ventana corta lee solo los bytes que necesita,
+por lo que la latencia debe crecer con la ventana y no con el archivo.
+
+Uso: python -m benchmarks.window_pushdown
+"""
+from time import perf_counter
+
+from src.data.make_dataset import get_minma_data, get_row_index, get_minma_path
+
+STATION = 'concon'
+PARAMS = ['NO', 'NO2', 'CO']
+WINDOWS = ['1D', '7D', '30D', '365D', '1825D', None]
+REPEATS = 5
+
+
+def bench(from_last):
+    timings = []
+    for _ in range(REPEATS):
+        t0 = perf_counter()
+        data_df = get_minma_data(PARAMS, STATION, from_last=from_last, use_cache=False)
+        timings.append(perf_counter() - t0)
+    return min(timings), data_df.shape[0]
+
+
+def main():
+    # El índice de filas se deja en caché, como ocurre tras la primera lectura.
+    for param in PARAMS:
+        get_row_index(get_minma_path(STATION, param))
+    print(f'{"from_last":>10}\t{"filas":>8}\t{"tiempo [s]":>10}')
+    for from_last in WINDOWS:
+        elapsed, n_rows = bench(from_last)
+        print(f'{str(from_last):>10}\t{n_rows:>8}\t{elapsed:>10.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import os
+from importlib.util import find_spec
+
+import aiohttp
+import pandas as pd
+
+PARAMETERS = {'SO2':'0001', 'NO':'0002', 'NO2':'0003', 'CO':'0004', 'O3':'0008',
+              'Cu':'00Cu', 'Pb':'00Pb', 'CH4':'0CH4', 'NOX':'0NOX', 'As':'0HCM',
+              'CH6':'0CH6', 'CH7':'0CH7', 'MP10':'PM10', 'MP25':'PM25', 'tempdiff':'DTMP',
+              'rad':'GLOB', 'pres':'PRES', 'precip':'RAIN', 'relhum':'RHUM', 'temp':'TEMP',
+              'dirviento':'WDIR', 'velviento':'WSPD'}
+
+STATIONS = {'Alto Hospicio':'117', 'Antofagasta':'237', 'Copiapo sivica':'332', 'Huasco Sivica':'333', 'Andacollo':'420',
+            'Cuncumen SIVICA':'424', 'La Serena':'425', 'Coquimbo':'426', 'La Greda':'503', 'Los Maitenes':'504', 'Puchuncaví':'505',
+            'Sur':'506', 'Valle Alegre':'507', 'Met Principal':'508', 'Concon':'509', 'Colmo':'511', 'Las Gaviotas':'512',
+            'Vina del mar':'529', 'Los Andes':'532', 'Junta de Vecinos':'535', 'Centro Quintero':'539', 'Quintero':'540',
+            'Central Quintero':'546', 'Loncura':'547', 'Ventanas':'548', 'Valparaiso':'550', 'Concon MMA':'560', 'Rancagua':'609',
+            'Rengo': '611', 'San Fernando':'612', 'Rancagua II':'615', 'La Florida_Talca':'703', 'Curico':'709', 'U.C. Maule':'710',
+            'Universidad de Talca':'711', 'Linares':'713', 'Consultorio - San Vicente':'802', 'Inia-Chillan':'810', 'Kingston College':'827',
+            'Liceo Polivalente':'830', 'Cerro Merquin':'831', 'Balneario Curanilahue':'832', 'Meteorológico, Hualqui':'834', 'Hualqui':'841',
+            'Puntera':'854', 'Puren':'873', 'Los Angeles Oriente':'874', '21 de Mayo':'875', 'Las Encinas':'901', 'Padre Las Casas II':'902',
+            'Ferroviario':'904', 'Nielol':'905', 'Osorno':'A01', 'MIRASOL_sivica':'A07', 'Alerce':'A08', 'Coyhaique':'B03', 'Coyhaique 2':'B04',
+            'Vialidad':'B05', 'Punta Arenas':'C05', 'Independencia':'D11', 'La Florida':'D12', 'Las Condes':'D13', "Parque O'Higgins":'D14',
+            'Pudahuel':'D15', 'Cerrillos':'D16', 'El Bosque':'D17', 'Cerro Navia':'D18', 'Puente Alto':'D27', 'Talagante':'D28', 'Quilicura':'D29',
+            'Quilicura II':'D30', 'Cerrillos Movil':'D31', 'Cerrillos Movil2':'D35', 'Valdivia':'E03', 'La Union':'E04', 'Valdivia 2':'E08', 'Arica':'F01'}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MANIFEST_NAME = 'manifest.json'
+
+
+def unix_to_datetime(unix_date):
+    return pd.to_datetime(unix_date, unit='s')
+
+
+def datetime_to_unix(datetime):
+    return int(pd.Timestamp(datetime).timestamp())
+
+
+def time_chunks(from_date, to_date, chunk='365D'):
+    """Divide un período en tramos consecutivos de largo 'chunk'.
+
+    Parameters
+    ----------
+    from_date : str or pd.Timestamp
+        Inicio del período.
+    to_date : str or pd.Timestamp
+        Término del período.
+    chunk : str
+        str con el largo de cada tramo.
+
+    Returns
+    -------
+    list
+        list de tuplas (inicio, término) en segundos unix.
+    """
+    start, end = datetime_to_unix(from_date), datetime_to_unix(to_date)
+    step = int(pd.Timedelta(chunk).total_seconds())
+    return [(chunk_start, min(chunk_start + step, end)) for chunk_start in range(start, end, step)]
+
+
+class AsyncDatabaseMMA:
+    """Cliente asíncrono de la API de SINCA del Ministerio del Medio Ambiente.
+    Las consultas comparten un grupo acotado de conexiones y se reintentan
+    con espera exponencial ante errores de red o del servidor. Se utiliza
+    como 'async with AsyncDatabaseMMA() as db: ...'.
+
+    Parameters
+    ----------
+    db_url : str (optional)
+        URL base de la API. Por defecto se lee 'DATABASE_URL' del entorno.
+    auth_url : str (optional)
+        URL de autenticación. Por defecto se lee 'AUTH_URL' del entorno.
+        Si no existe, no se autentica la sesión.
+    username : str (optional)
+        Usuario de la API. Por defecto se lee 'USERNAME' del entorno.
+    password : str (optional)
+        Contraseña de la API. Por defecto se lee 'PASSWORD' del entorno.
+    max_connections : int
+        Cantidad máxima de conexiones simultáneas.
+    retries : int
+        Cantidad de reintentos de cada consulta.
+    backoff : float
+        Espera en segundos antes del primer reintento, que se duplica en
+        cada reintento siguiente.
+    timeout : float
+        Tiempo máximo en segundos de cada consulta.
+    """
+
+    def __init__(self, db_url=None, auth_url=None, username=None, password=None,
+                 max_connections=8, retries=4, backoff=0.5, timeout=120):
+        if find_spec('dotenv') is not None:
+            from dotenv import find_dotenv, load_dotenv
+            load_dotenv(find_dotenv(usecwd=True))
+        self.db_url = db_url or os.environ.get('DATABASE_URL')
+        self.auth_url = auth_url or os.environ.get('AUTH_URL')
+        self.username = username or os.environ.get('USERNAME')
+        self.password = password or os.environ.get('PASSWORD')
+        if self.db_url is None:
+            raise ValueError("Falta la URL de la API, ya sea como 'db_url' o en la variable DATABASE_URL")
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        # El semáforo limita las consultas en curso, para que el tiempo de
+        # espera por una conexión libre no cuente en el 'timeout'.
+        self.semaphore = asyncio.Semaphore(self.max_connections)
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        if self.auth_url is not None:
+            await self._request('POST', self.auth_url, parse_json=False,
+                                data={'username': self.username, 'password': self.password})
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def _request(self, method, url, parse_json=True, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore, self.session.request(method, url, **kwargs) as response:
+                    if response.status not in RETRY_STATUS:
+                        response.raise_for_status()
+                        if parse_json:
+                            return await response.json(content_type=None)
+                        return await response.read()
+                    error = aiohttp.ClientResponseError(response.request_info, response.history,
+                                                        status=response.status, message=response.reason)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as exc:
+                error = exc
+            if attempt == self.retries:
+                raise error
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def get_json(self, path):
+        """Consulta una ruta de la API y entrega la respuesta como JSON.
+
+        Parameters
+        ----------
+        path : str
+            Ruta relativa a 'db_url', por ejemplo '/domain/SMA/station'.
+
+        Returns
+        -------
+        dict
+            Respuesta de la API.
+        """
+        return await self._request('GET', self.db_url + path)
+
+    async def get_resolution(self):
+        response = await self.get_json('/domain/SMA/resolution')
+        return pd.DataFrame(response['data']).drop('links', axis=1)
+
+    async def get_available_timeseries(self, resolution):
+        response = await self.get_json(f'/domain/SMA/resolution/{resolution}/timeserie')
+        return pd.DataFrame(response['data']).drop('links', axis=1)
+
+    async def get_stations(self):
+        response = await self.get_json('/domain/SMA/station')
+        return pd.DataFrame(response['data']).drop('links', axis=1).sort_values(by='name')
+
+    async def get_station_details(self, station):
+        response = await self.get_json(f'/domain/SMA/station/{STATIONS[station]}')
+        return pd.DataFrame(response['data'])
+
+    async def get_timeserie(self, station, par, from_date, to_date, res='+'):
+        """Descarga la serie de tiempo de un parámetro en una estación. Si la
+        API entrega la serie incompleta, se vuelve a consultar desde el
+        último registro recibido.
+
+        Parameters
+        ----------
+        station : str
+            Nombre de la estación, ver 'STATIONS'.
+        par : str
+            Parámetro monitoreado, ver 'PARAMETERS'.
+        from_date : str, pd.Timestamp or int
+            Inicio del período, como fecha o en segundos unix.
+        to_date : str, pd.Timestamp or int
+            Término del período, como fecha o en segundos unix.
+        res : str
+            Resolución de la serie.
+
+        Returns
+        -------
+        pd.DataFrame
+            pd.DataFrame con las columnas 'timestamp', en segundos unix, y
+            el parámetro.
+        """
+        from_date = from_date if isinstance(from_date, int) else datetime_to_unix(from_date)
+        to_date = to_date if isinstance(to_date, int) else datetime_to_unix(to_date)
+        code = f'{STATIONS[station]}{res}M{PARAMETERS[par]}VAL'
+        pages = []
+        last_date = from_date
+        while True:
+            response = await self.get_json(f'/domain/SMA/timeserie/{code}/{last_date}/{to_date}')
+            page = response['data']['timeserie']
+            if not page:
+                break
+            pages.append(pd.DataFrame(page)[['timestamp', 'value']])
+            new_last_date = int(page[-1]['timestamp'])
+            if new_last_date >= to_date or new_last_date <= last_date:
+                break
+            last_date = new_last_date
+        if not pages:
+            return pd.DataFrame({'timestamp': pd.Series(dtype='int64'), par: pd.Series(dtype='float64')})
+        # Cada página comienza en el último registro de la anterior.
+        timeserie_df = pd.concat(pages).drop_duplicates('timestamp', keep='last')
+        return timeserie_df.rename({'value': par}, axis=1).reset_index(drop=True)
+
+    async def download(self, pairs, from_date, to_date, output_dir, chunk='365D'):
+        """Descarga de forma concurrente las series de varias combinaciones
+        de estación y parámetro, divididas en tramos de largo 'chunk'. Cada
+        tramo se guarda como CSV en 'output_dir' y se registra en un
+        manifiesto, por lo que una descarga interrumpida se retoma sin
+        repetir los tramos ya descargados. Si algún tramo falla, se espera
+        al resto y luego se levanta el primer error.
+
+        Parameters
+        ----------
+        pairs : list
+            list de tuplas (estación, parámetro).
+        from_date : str or pd.Timestamp
+            Inicio del período.
+        to_date : str or pd.Timestamp
+            Término del período.
+        output_dir : str or Path
+            Directorio donde se guardan los tramos y el manifiesto.
+        chunk : str
+            str con el largo de cada tramo.
+
+        Returns
+        -------
+        dict
+            dict que asocia cada tupla (estación, parámetro) con su serie
+            completa como pd.DataFrame indexado por fecha.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+
+        chunk_files = {}
+        pending = []
+        for station, par in pairs:
+            for chunk_start, chunk_end in time_chunks(from_date, to_date, chunk):
+                key = f'{STATIONS[station]}+M{PARAMETERS[par]}VAL/{chunk_start}/{chunk_end}'
+                file_name = f'{STATIONS[station]}_{PARAMETERS[par]}_{chunk_start}_{chunk_end}.csv'
+                chunk_files.setdefault((station, par), []).append(file_name)
+                if manifest.get(key) != file_name or not os.path.exists(os.path.join(output_dir, file_name)):
+                    pending.append((key, file_name, station, par, chunk_start, chunk_end))
+
+        async def fetch_chunk(key, file_name, station, par, chunk_start, chunk_end):
+            chunk_df = await self.get_timeserie(station, par, chunk_start, chunk_end)
+            # El tramo incluye su inicio y excluye su término, salvo el último.
+            if chunk_end != datetime_to_unix(to_date):
+                chunk_df = chunk_df[chunk_df['timestamp'] < chunk_end]
+            file_path = os.path.join(output_dir, file_name)
+            chunk_df.to_csv(f'{file_path}.tmp', index=False)
+            os.replace(f'{file_path}.tmp', file_path)
+            manifest[key] = file_name
+            save_manifest()
+
+        def save_manifest():
+            tmp_manifest = f'{manifest_path}.tmp'
+            with open(tmp_manifest, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_manifest, manifest_path)
+
+        # Se espera a que terminen todos los tramos antes de salir, de modo
+        # que ninguno siga usando la sesión después de un error y que el
+        # manifiesto registre todos los tramos descargados.
+        results = await asyncio.gather(*[fetch_chunk(*task) for task in pending], return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            save_manifest()
+            raise errors[0]
+
+        timeseries = {}
+        for pair, file_names in chunk_files.items():
+            pair_df = pd.concat([pd.read_csv(os.path.join(output_dir, name)) for name in file_names])
+            pair_df.index = unix_to_datetime(pair_df.pop('timestamp'))
+            timeseries[pair] = pair_df.rename_axis(None)
+        return timeseries
+
+
+def download_timeseries(pairs, from_date, to_date, output_dir, chunk='365D', **client_options):
+    """Descarga las series de varias combinaciones de estación y parámetro
+    con 'AsyncDatabaseMMA.download', desde código sincrónico.
+
+    Parameters
+    ----------
+    pairs : list
+        list de tuplas (estación, parámetro).
+    from_date : str or pd.Timestamp
+        Inicio del período.
+    to_date : str or pd.Timestamp
+        Término del período.
+    output_dir : str or Path
+        Directorio donde se guardan los tramos y el manifiesto.
+    chunk : str
+        str con el largo de cada tramo.
+    **client_options
+        Opciones de 'AsyncDatabaseMMA'.
+
+    Returns
+    -------
+    dict
+        dict que asocia cada tupla (estación, parámetro) con su serie.
+    """
+    async def run():
+        async with AsyncDatabaseMMA(**client_options) as db:
+            return await db.download(pairs, from_date, to_date, output_dir, chunk)
+    return asyncio.run(run())
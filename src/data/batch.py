@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter
+
+import numpy as np
+
+from src.data.cache import minma_cache
+from src.data.make_dataset import get_minma_data, get_minma_path
+from src.utils import get_project_root
+
+DEFAULT_MANIFEST = get_project_root() / 'data' / 'datasets.json'
+PROCESSED_DIR = get_project_root() / 'data' / 'processed'
+TARGET_DEFAULTS = {'from_last': None, 'to_date': -1, 'n_cols': 5, 'format': 'pickle'}
+
+
+def load_manifest(path=DEFAULT_MANIFEST):
+    """Lee la lista de datasets a construir desde un archivo JSON con una
+    lista 'datasets', donde cada elemento indica 'output', 'station' y
+    'params', y de forma opcional 'from_last', 'to_date', 'n_cols' y
+    'format' ('pickle' o 'parquet').
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo JSON.
+
+    Returns
+    -------
+    list
+        list de dict con la configuración completa de cada dataset.
+    """
+    with open(path) as f:
+        datasets = json.load(f)['datasets']
+    targets = []
+    for dataset in datasets:
+        missing = {'output', 'station', 'params'} - set(dataset)
+        if missing:
+            raise ValueError(f"Faltan los campos {sorted(missing)} en el dataset {dataset}")
+        targets.append({**TARGET_DEFAULTS, **dataset})
+    outputs = [target['output'] for target in targets]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError('Hay datasets con el mismo nombre de salida')
+    return targets
+
+
+def file_digest(path):
+    """Calcula el hash del contenido de un archivo. El resultado se guarda
+    en el caché junto a su tamaño y fecha de modificación, por lo que solo
+    se vuelve a leer el archivo si cambió.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo.
+
+    Returns
+    -------
+    str
+        Hash sha1 hexadecimal del contenido.
+    """
+    cached = minma_cache.get_arrays(path, kind='digest')
+    if cached is not None:
+        return str(cached['sha1'])
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            sha1.update(block)
+    digest = sha1.hexdigest()
+    minma_cache.put_arrays(path, {'sha1': np.array(digest)}, kind='digest')
+    return digest
+
+
+def output_path(target):
+    if target['format'] == 'parquet':
+        return os.path.join(PROCESSED_DIR, target['output'])
+    return os.path.join(PROCESSED_DIR, f"{target['output']}.pkl")
+
+
+def stamp_path(target):
+    return os.path.join(PROCESSED_DIR, f"{target['output']}.build.json")
+
+
+def target_stamp(target):
+    """Resume la configuración de un dataset y el hash de cada CSV del
+    que depende.
+
+    Parameters
+    ----------
+    target : dict
+        Configuración del dataset, como la entrega 'load_manifest'.
+
+    Returns
+    -------
+    dict
+        dict con la configuración ('config') y los hashes ('inputs').
+    """
+    config = {**target, 'to_date': str(target['to_date'])}
+    inputs = {param: file_digest(get_minma_path(target['station'], param)) for param in target['params']}
+    return {'config': config, 'inputs': inputs}
+
+
+def is_stale(target, stamp):
+    """Indica si un dataset se debe reconstruir porque no existe o porque
+    su configuración o sus archivos de entrada cambiaron.
+
+    Parameters
+    ----------
+    target : dict
+        Configuración del dataset.
+    stamp : dict
+        Resumen actual entregado por 'target_stamp'.
+
+    Returns
+    -------
+    bool
+        True si el dataset está desactualizado.
+    """
+    if not os.path.exists(output_path(target)) or not os.path.exists(stamp_path(target)):
+        return True
+    with open(stamp_path(target)) as f:
+        try:
+            return json.load(f) != stamp
+        except json.JSONDecodeError:
+            return True
+
+
+def build_target(target, use_cache=True):
+    """Construye y guarda un dataset.
+
+    Parameters
+    ----------
+    target : dict
+        Configuración del dataset.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    int
+        Cantidad de filas del dataset guardado.
+    """
+    dataset = get_minma_data(target['params'], target['station'], target['from_last'], target['to_date'],
+                             target['n_cols'], use_cache)
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    if target['format'] == 'parquet':
+        from src.data.store import write_partitioned
+        write_partitioned(dataset, output_path(target), target['station'])
+    else:
+        dataset.to_pickle(output_path(target))
+    return dataset.shape[0]
+
+
+def run_target(target, stamp, use_cache=True):
+    t0 = perf_counter()
+    try:
+        n_rows = build_target(target, use_cache)
+    except Exception as error:
+        return {'status': 'error', 'rows': None, 'seconds': perf_counter() - t0, 'error': repr(error)}
+    # El resumen se guarda solo tras una construcción exitosa.
+    with open(stamp_path(target), 'w') as f:
+        json.dump(stamp, f, indent=2)
+    return {'status': 'built', 'rows': n_rows, 'seconds': perf_counter() - t0, 'error': None}
+
+
+def run_batch(targets, max_workers=None, force=False, use_cache=True):
+    """Construye en paralelo los datasets desactualizados de una lista y
+    omite los que no cambiaron desde la última construcción.
+
+    Parameters
+    ----------
+    targets : list
+        list de configuraciones, como la que entrega 'load_manifest'.
+    max_workers : int
+        Cantidad de procesos a utilizar. Con 1 se construye de forma
+        secuencial.
+    force : bool
+        Condición para reconstruir todos los datasets.
+    use_cache : bool
+        Condición para utilizar el caché en disco al leer los CSV.
+
+    Returns
+    -------
+    list
+        list de dict con el nombre, estado ('skipped', 'built' o 'error'),
+        filas, segundos y error de cada dataset, en el orden de 'targets'.
+    """
+    summaries = {}
+    stale = []
+    for target in targets:
+        t0 = perf_counter()
+        try:
+            stamp = target_stamp(target)
+        except Exception as error:
+            # Un CSV faltante o ilegible solo afecta a su dataset.
+            summaries[target['output']] = {'status': 'error', 'rows': None,
+                                           'seconds': perf_counter() - t0, 'error': repr(error)}
+            continue
+        if force or is_stale(target, stamp):
+            stale.append((target, stamp))
+        else:
+            summaries[target['output']] = {'status': 'skipped', 'rows': None,
+                                           'seconds': perf_counter() - t0, 'error': None}
+    if stale:
+        stale_targets, stamps = zip(*stale)
+        if max_workers == 1 or len(stale) == 1:
+            results = list(map(run_target, stale_targets, stamps, repeat(use_cache)))
+        else:
+            with ProcessPoolExecutor(max_workers) as executor:
+                results = list(executor.map(run_target, stale_targets, stamps, repeat(use_cache)))
+        for target, result in zip(stale_targets, results):
+            summaries[target['output']] = result
+    return [{'output': target['output'], **summaries[target['output']]} for target in targets]
+
+
+def format_summary(summaries, elapsed):
+    """Arma una tabla de texto con el resultado de 'run_batch'.
+
+    Parameters
+    ----------
+    summaries : list
+        list entregada por 'run_batch'.
+    elapsed : float
+        Tiempo total de la ejecución en segundos.
+
+    Returns
+    -------
+    str
+        Tabla con una fila por dataset y el tiempo total.
+    """
+    width = max([len('dataset')] + [len(summary['output']) for summary in summaries])
+    lines = [f'{"dataset":<{width}}\t{"estado":>8}\t{"filas":>8}\t{"tiempo [s]":>10}']
+    for summary in summaries:
+        rows = '-' if summary['rows'] is None else summary['rows']
+        lines.append(f'{summary["output"]:<{width}}\t{summary["status"]:>8}\t{rows:>8}\t{summary["seconds"]:>10.2f}')
+        if summary['error'] is not None:
+            lines.append(f'    {summary["error"]}')
+    lines.append(f'{"total":<{width}}\t{"":>8}\t{"":>8}\t{elapsed:>10.2f}')
+    return '\n'.join(lines)
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import time
+import warnings
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+from src.utils import get_project_root
+
+DEFAULT_CACHE_DIR = get_project_root() / 'data' / 'interim' / 'cache'
+DEFAULT_MAX_BYTES = 1024 ** 3
+# Cada entrada tiene su propio archivo de metadatos, de modo que procesos
+# concurrentes no se pisen al actualizar un índice común.
+META_EXT = '.meta.json'
+DATA_EXTS = ('.parquet', '.npz')
+
+
+def has_pyarrow():
+    """Indica si pyarrow está disponible para leer Parquet con filtros.
+
+    Returns
+    -------
+    bool
+        True si pyarrow está instalado.
+    """
+    return find_spec('pyarrow') is not None
+
+
+def has_parquet_engine():
+    """Indica si hay un motor de Parquet disponible para pandas.
+
+    Returns
+    -------
+    bool
+        True si pyarrow o fastparquet están instalados.
+    """
+    return find_spec('pyarrow') is not None or find_spec('fastparquet') is not None
+
+
+class ParsedCache:
+    """Caché en disco de archivos CSV ya procesados, guardados como Parquet.
+
+    Cada entrada se identifica por la ruta del archivo fuente, su tamaño,
+    su fecha de modificación y las opciones de lectura, por lo que un
+    archivo modificado invalida su entrada de forma automática. Cuando
+    el tamaño total supera 'max_bytes' se eliminan las entradas usadas
+    hace más tiempo.
+
+    Parameters
+    ----------
+    cache_dir : str or Path
+        Directorio donde se guardan los archivos del caché.
+    max_bytes : int
+        Tamaño máximo del caché en bytes.
+    enabled : bool
+        Condición para activar el caché. Se desactiva si no hay un
+        motor de Parquet instalado.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled and has_parquet_engine()
+        self.hits = 0
+        self.misses = 0
+        if enabled and not self.enabled:
+            warnings.warn('No hay motor de Parquet instalado, el caché queda desactivado.')
+
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}{META_EXT}')
+
+    def _load_index(self):
+        """Construye el índice a partir de los metadatos de cada entrada. La
+        fecha del último uso es la fecha de modificación de su archivo de
+        metadatos."""
+        index = {}
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return index
+        for name in names:
+            if not name.endswith(META_EXT):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            try:
+                with open(meta_path) as f:
+                    entry = json.load(f)
+                entry['atime'] = os.stat(meta_path).st_mtime
+            except (FileNotFoundError, json.JSONDecodeError):
+                # Entrada eliminada o escrita por otro proceso en este momento.
+                continue
+            index[name[:-len(META_EXT)]] = entry
+        return index
+
+    def _save_entry(self, key, entry):
+        meta_path = self._meta_path(key)
+        tmp_path = f'{meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _source_id(path, options):
+        return json.dumps([os.path.abspath(path), sorted(options.items())])
+
+    def key(self, path, **options):
+        """Calcula la llave de un archivo fuente y sus opciones de lectura.
+
+        Parameters
+        ----------
+        path : str or Path
+            Ruta al archivo fuente.
+        **options
+            Opciones de lectura que afectan el resultado.
+
+        Returns
+        -------
+        str
+            Llave hexadecimal de la entrada.
+        """
+        stat = os.stat(path)
+        raw_key = json.dumps([self._source_id(path, options), stat.st_size, stat.st_mtime_ns])
+        return hashlib.sha1(raw_key.encode()).hexdigest()
+
+    def get(self, path, columns=None, filters=None, **options):
+        """Busca un archivo dentro del caché.
+
+        Parameters
+        ----------
+        path : str or Path
+            Ruta al archivo fuente.
+        columns : list (optional)
+            Columnas a leer. Por defecto se leen todas.
+        filters : list (optional)
+            Filtros de Parquet a aplicar durante la lectura.
+        **options
+            Opciones de lectura con las que se guardó la entrada.
+
+        Returns
+        -------
+        pd.DataFrame or None
+            DataFrame guardado, o None si no existe una entrada válida.
+        """
+        file_path = self._lookup(path, '.parquet', options)
+        if file_path is None:
+            return None
+        if filters is not None and not has_pyarrow():
+            filters = None
+        return pd.read_parquet(file_path, columns=columns, filters=filters)
+
+    def get_arrays(self, path, **options):
+        """Busca arreglos de numpy asociados a un archivo fuente.
+
+        Parameters
+        ----------
+        path : str or Path
+            Ruta al archivo fuente.
+        **options
+            Opciones con las que se guardaron los arreglos.
+
+        Returns
+        -------
+        dict or None
+            dict con los arreglos guardados, o None si no existe una
+            entrada válida.
+        """
+        file_path = self._lookup(path, '.npz', options)
+        if file_path is None:
+            return None
+        with np.load(file_path, allow_pickle=False) as arrays:
+            return {name: array[()] if array.ndim == 0 else array for name, array in arrays.items()}
+
+    def _lookup(self, path, ext, options):
+        if not self.enabled:
+            return None
+        key = self.key(path, **options)
+        meta_path = self._meta_path(key)
+        file_path = os.path.join(self.cache_dir, f'{key}{ext}')
+        if not (os.path.exists(meta_path) and os.path.exists(file_path)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        # El uso se registra en la fecha de los metadatos, sin reescribirlos.
+        try:
+            os.utime(meta_path)
+        except FileNotFoundError:
+            pass
+        return file_path
+
+    def put(self, path, df, row_group_size=None, **options):
+        """Guarda un DataFrame asociado a un archivo fuente.
+
+        Parameters
+        ----------
+        path : str or Path
+            Ruta al archivo fuente.
+        df : pd.DataFrame
+            DataFrame procesado a guardar.
+        row_group_size : int (optional)
+            Cantidad de filas por 'row group' del archivo Parquet.
+        **options
+            Opciones de lectura que generaron el DataFrame.
+        """
+        self._store(path, '.parquet', lambda tmp_path: df.to_parquet(tmp_path, row_group_size=row_group_size), options)
+
+    def put_arrays(self, path, arrays, **options):
+        """Guarda arreglos de numpy asociados a un archivo fuente.
+
+        Parameters
+        ----------
+        path : str or Path
+            Ruta al archivo fuente.
+        arrays : dict
+            dict con nombres y arreglos de numpy a guardar.
+        **options
+            Opciones que generaron los arreglos.
+        """
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+        self._store(path, '.npz', write, options)
+
+    def _store(self, path, ext, write, options):
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        key = self.key(path, **options)
+        file_name = f'{key}{ext}'
+        file_path = os.path.join(self.cache_dir, file_name)
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        write(tmp_path)
+        os.replace(tmp_path, file_path)
+
+        index = self._load_index()
+        source = self._source_id(path, options)
+        for stale_key in [k for k, e in index.items() if e['source'] == source and k != key]:
+            self._remove(index, stale_key)
+        entry = {'source': source, 'file': file_name, 'bytes': os.path.getsize(file_path)}
+        self._save_entry(key, entry)
+        index[key] = dict(entry, atime=time.time())
+        self._evict(index)
+
+    def _remove(self, index, key):
+        entry = index.pop(key, None)
+        if entry is None:
+            return
+        # Primero los metadatos, para que la entrada deje de estar disponible.
+        for file_path in [self._meta_path(key), os.path.join(self.cache_dir, entry['file'])]:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, index):
+        total = sum(e['bytes'] for e in index.values())
+        for key in sorted(index, key=lambda k: index[k]['atime']):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]['bytes']
+            self._remove(index, key)
+
+    def clear(self):
+        """Elimina todas las entradas del caché, incluidos los archivos sin
+        metadatos, y reinicia los contadores."""
+        index = self._load_index()
+        for key in list(index):
+            self._remove(index, key)
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(DATA_EXTS):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except FileNotFoundError:
+                        pass
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Entrega un resumen del uso del caché.
+
+        Returns
+        -------
+        dict
+            dict con aciertos, fallos, cantidad de entradas y tamaño en bytes.
+        """
+        index = self._load_index()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(index),
+            'bytes': sum(e['bytes'] for e in index.values()),
+        }
+
+
+minma_cache = ParsedCache()
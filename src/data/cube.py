@@ -0,0 +1,255 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data.make_dataset import get_minma_path, read_minma_file
+from src.data.row_index import get_row_index
+from src.utils import get_project_root
+
+DEFAULT_CUBE_PATH = get_project_root() / 'data' / 'processed' / 'minma_cube.npy'
+HOUR = pd.Timedelta(hours=1)
+
+
+def list_raw_files():
+    """Recorre 'data/raw' y entrega las combinaciones de estación y parámetro
+    disponibles como series de tiempo de MINMA. Se omiten los archivos que
+    no son series horarias ordenadas, como tablas de resumen.
+
+    Returns
+    -------
+    dict
+        dict que asocia cada estación con su lista ordenada de parámetros.
+    """
+    raw_dir = get_project_root() / 'data' / 'raw'
+    station_params = {}
+    for station_dir in sorted(p for p in raw_dir.iterdir() if p.is_dir()):
+        station = station_dir.name
+        params = []
+        for path in sorted(station_dir.glob(f'{station}_*.csv')):
+            if get_row_index(path) is not None:
+                params.append(path.stem[len(station) + 1:])
+        if params:
+            station_params[station] = params
+    return station_params
+
+
+def file_bounds(station, param, use_cache=True):
+    """Entrega la primera y última fecha de un archivo, desde su índice de
+    filas si existe.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param : str
+        str con el parámetro monitoreado.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    tuple
+        tuple con la primera y la última fecha del archivo.
+    """
+    row_index = get_row_index(get_minma_path(station, param))
+    if row_index is not None:
+        return pd.Timestamp(row_index['first_stamp']), pd.Timestamp(row_index['last_stamp'])
+    index = read_minma_file(station, param, None, use_cache).index
+    return index.min(), index.max()
+
+
+def sidecar_path(path):
+    return f'{os.path.splitext(path)[0]}.json'
+
+
+def build_cube(station_params=None, path=DEFAULT_CUBE_PATH, use_cache=True):
+    """Construye un arreglo en disco de forma (estación, parámetro, hora)
+    con los datos de toda la red, en float32 y con NaN en las horas sin
+    registro. Para cada hora se guarda el mejor registro disponible:
+    validado, preliminar o no validado, en ese orden. Las coordenadas se
+    guardan en un archivo JSON junto al arreglo.
+
+    Parameters
+    ----------
+    station_params : dict (optional)
+        dict que asocia cada estación con sus parámetros. Por defecto se
+        usan todos los archivos de 'data/raw'.
+    path : str or Path
+        Ruta del archivo .npy a crear.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    MinmaCube
+        Cubo recién construido, abierto en modo lectura.
+    """
+    if station_params is None:
+        station_params = list_raw_files()
+    stations = list(station_params)
+    params = sorted({param for station in stations for param in station_params[station]})
+
+    bounds = [file_bounds(station, param, use_cache) for station in stations for param in station_params[station]]
+    start = min(first for first, _ in bounds).floor(HOUR)
+    n_hours = (max(last for _, last in bounds) - start) // HOUR + 1
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cube = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                     shape=(len(stations), len(params), n_hours))
+    cube[:] = np.nan
+    for s_idx, station in enumerate(stations):
+        for param in station_params[station]:
+            param_df = read_minma_file(station, param, None, use_cache, layout='coalesced')
+            values = param_df[param].to_numpy()
+            hours = (param_df.index - start) // HOUR
+            cube[s_idx, params.index(param), hours] = values
+    cube.flush()
+    del cube
+
+    coords = {
+        'stations': stations,
+        'params': params,
+        'start': start.isoformat(),
+        'freq': '1h',
+        'shape': [len(stations), len(params), n_hours],
+        'dtype': 'float32',
+    }
+    with open(sidecar_path(path), 'w') as f:
+        json.dump(coords, f, indent=2)
+    return MinmaCube(path)
+
+
+class MinmaCube:
+    """Cubo (estación, parámetro, hora) de la red abierto como memmap de
+    solo lectura. Abrirlo no copia datos, y varios procesos que lo abran
+    comparten las mismas páginas en memoria.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta del archivo .npy creado con 'build_cube'.
+    """
+
+    def __init__(self, path=DEFAULT_CUBE_PATH):
+        self.path = path
+        with open(sidecar_path(path)) as f:
+            coords = json.load(f)
+        self.stations = coords['stations']
+        self.params = coords['params']
+        self.start = pd.Timestamp(coords['start'])
+        self.data = np.load(path, mmap_mode='r')
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def time_index(self, time_slice=slice(None)):
+        """DatetimeIndex horario de un tramo del eje temporal del cubo."""
+        first, last, _ = time_slice.indices(self.data.shape[2])
+        return pd.date_range(self.start + first * HOUR, periods=max(last - first, 0), freq=HOUR)
+
+    def hour_position(self, date):
+        """Posición en el eje temporal de la primera hora desde 'date',
+        sin salirse del cubo."""
+        position = -((self.start - pd.Timestamp(date)) // HOUR)
+        return min(max(position, 0), self.data.shape[2])
+
+    def _time_slice(self, start, end):
+        first = 0 if start is None else self.hour_position(start)
+        last = self.data.shape[2] if end is None else self.hour_position(pd.Timestamp(end) + pd.Timedelta(1))
+        return slice(first, last)
+
+    def sel(self, station=None, param=None, start=None, end=None):
+        """Entrega una vista del cubo, sin copiar ni leer datos fuera del
+        rango pedido.
+
+        Parameters
+        ----------
+        station : str or list (optional)
+            Estación o lista de estaciones. Por defecto todas.
+        param : str or list (optional)
+            Parámetro o lista de parámetros. Por defecto todos.
+        start : str or pd.Timestamp (optional)
+            Primera fecha a considerar.
+        end : str or pd.Timestamp (optional)
+            Última fecha a considerar.
+
+        Returns
+        -------
+        np.array
+            Arreglo con las dimensiones no seleccionadas con un str.
+        """
+        return self.data[self._axis_key(station, self.stations),
+                         self._axis_key(param, self.params),
+                         self._time_slice(start, end)]
+
+    @staticmethod
+    def _axis_key(labels, coords):
+        if labels is None:
+            return slice(None)
+        if isinstance(labels, str):
+            return coords.index(labels)
+        return [coords.index(label) for label in labels]
+
+    def to_frame(self, station, params=None, start=None, end=None):
+        """Entrega los datos de una estación como DataFrame indexado por hora.
+
+        Parameters
+        ----------
+        station : str
+            str con nombre de la estación de interés.
+        params : list (optional)
+            Parámetros a incluir. Por defecto todos.
+        start : str or pd.Timestamp (optional)
+            Primera fecha a considerar.
+        end : str or pd.Timestamp (optional)
+            Última fecha a considerar.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame con una columna por parámetro.
+        """
+        params = self.params if params is None else list(params)
+        time_slice = self._time_slice(start, end)
+        values = self.data[self.stations.index(station), [self.params.index(p) for p in params], time_slice]
+        return pd.DataFrame(values.T, index=self.time_index(time_slice), columns=params)
+
+    def daily_tensor(self, station, params=None, start=None, end=None):
+        """Entrega los datos de una estación como arreglo (día, hora,
+        parámetro), con el mismo formato que 'daily_tensor' de
+        'src.eda.processing'. Se consideran solo los días completos del
+        período. Con todos los parámetros o uno solo, el arreglo es una
+        vista del cubo y no se copian datos.
+
+        Parameters
+        ----------
+        station : str
+            str con nombre de la estación de interés.
+        params : str or list (optional)
+            Parámetro o lista de parámetros. Por defecto todos.
+        start : str or pd.Timestamp (optional)
+            Primera fecha a considerar.
+        end : str or pd.Timestamp (optional)
+            Última fecha a considerar.
+
+        Returns
+        -------
+        tuple
+            tuple con el arreglo (día, hora, parámetro), un DatetimeIndex
+            con los días y la lista de parámetros.
+        """
+        time_slice = self._time_slice(start, end)
+        first = time_slice.start + (-(self.start + time_slice.start * HOUR).hour) % 24
+        n_days = max((time_slice.stop - first) // 24, 0)
+        values = self.data[self.stations.index(station), self._axis_key(params, self.params), first:first + 24 * n_days]
+        if values.ndim == 1:
+            values = values[None]
+        if params is None:
+            params = self.params
+        elif isinstance(params, str):
+            params = [params]
+        dates = pd.date_range(self.start + first * HOUR, periods=n_days, freq='D')
+        return values.T.reshape(n_days, 24, len(params)), dates, list(params)
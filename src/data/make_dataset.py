@@ -1,12 +1,65 @@
 from src.utils import get_project_root
+from src.data.cache import minma_cache
+from src.data.row_index import get_row_index, read_row_range, window_fraction
+import numpy as np
 import pandas as pd
 import os
+import sys
+import warnings
+from time import perf_counter
 from functools import reduce
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 
+INDEX_COLUMN = '__index_level_0__'
+STATUS_CATEGORIES = ['validado', 'preliminar', 'no validado', 'sin estado']
+STATUS_SUFFIX = '_estado'
+LAYOUTS = ['wide', 'coalesced']
+CACHE_ROW_GROUP_SIZE = 24 * 90
+PUSHDOWN_MAX_FRACTION = 0.5
 
-def adjust_index(minma_df):
+
+def decode_minma_index(dates, hours, century_pivot=90):
+    """Construye un DatetimeIndex a partir de las columnas enteras
+    'FECHA (YYMMDD)' y 'HORA (HHMM)' de MINMA usando aritmética de arreglos.
+    La hora '2400' se interpreta como las 00:00 del día siguiente.
+
+    Parameters
+    ----------
+    dates : array-like
+        Fechas en formato entero YYMMDD.
+    hours : array-like
+        Horas en formato entero HHMM.
+    century_pivot : int
+        Años de dos dígitos mayores o iguales a este valor se asignan
+        al siglo XX, y los menores al siglo XXI.
+
+    Returns
+    -------
+    pd.DatetimeIndex
+        DatetimeIndex con la fecha y hora de cada registro.
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    hours = np.asarray(hours, dtype=np.int64)
+    year, month_day = np.divmod(dates, 10000)
+    month, day = np.divmod(month_day, 100)
+    hour, minute = np.divmod(hours, 100)
+    year = year + np.where(year >= century_pivot, 1900, 2000)
+    invalid = ((month < 1) | (month > 12) | (day < 1) | (day > 31) | (hour < 0) | (minute < 0)
+               | (minute > 59) | (hour > 24) | ((hour == 24) & (minute > 0)))
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    invalid |= days.astype('datetime64[M]') != months
+    if invalid.any():
+        position = np.flatnonzero(invalid)[0]
+        raise ValueError(f'Fecha u hora inválida: {dates[position]:06d} {hours[position]:04d}, en la posición {position}')
+    stamps = days.astype('datetime64[ns]') + (hour * 60 + minute).astype('timedelta64[m]')
+    return pd.DatetimeIndex(stamps)
+
+
+def adjust_index(minma_df, century_pivot=90):
     """Combina los indices fecha y hora de un df con datos de MINMA
     y los transforma en un DatetimeIndex.
     
@@ -14,18 +67,203 @@ def adjust_index(minma_df):
     ----------
     minma_df : pd.DataFrame
         pd.DataFrame con datos de MINMA a modificar.
+    century_pivot : int
+        Año de dos dígitos desde el cual se considera el siglo XX.
     """    
-    padding = '0'
-    date_len = 6
-    time_len = 4 
-    minma_df.index = minma_df.index.set_levels([s.rjust(date_len,padding) for s in minma_df.index.levels[0].astype(str)], level=0)
-    minma_df.index = minma_df.index.set_levels([s.rjust(time_len,padding) for s in minma_df.index.levels[1].astype(str)], level=1)
-    minma_df.index = minma_df.index.map(' '.join)
-    minma_df.index = minma_df.index.map(lambda x: '20'+x if (x[0] != '9') else '19'+x) 
-    minma_df.index = pd.to_datetime(minma_df.index)
+    minma_df.index = decode_minma_index(minma_df.index.get_level_values(0),
+                                        minma_df.index.get_level_values(1),
+                                        century_pivot)
+
+
+def get_minma_path(station, param):
+    """Entrega el 'path' del CSV de MINMA para un parámetro de una estación.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param : str
+        str con el parámetro monitoreado.
+
+    Returns
+    -------
+    Path
+        objeto Path con la ubicación del archivo en 'data/raw'.
+    """
+    return get_project_root() / 'data' / 'raw' / station / f'{station}_{param}.csv'
+
+
+def detect_n_cols(path):
+    """Cuenta las columnas de un CSV de MINMA a partir de su encabezado.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo CSV.
+
+    Returns
+    -------
+    int
+        Cantidad de columnas, sin contar el separador final.
+    """
+    with open(path) as f:
+        header = f.readline().rstrip('\n')
+    return len(header.split(';')) - header.endswith(';')
+
+
+def coalesce_status(param_df, param):
+    """Resume las columnas de estado de un parámetro de MINMA en una columna
+    float32 con el mejor registro disponible (validado, preliminar o no
+    validado, en ese orden) y una columna categórica de 1 byte con el
+    estado del registro elegido. Los archivos de una sola columna quedan
+    con estado 'sin estado'.
+
+    Parameters
+    ----------
+    param_df : pd.DataFrame
+        pd.DataFrame de un parámetro, como lo entrega 'read_minma_file'.
+    param : str
+        str con el parámetro monitoreado.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con las columnas '{param}' y '{param}_estado'.
+    """
+    values = param_df.to_numpy(dtype=np.float64)
+    available = ~np.isnan(values)
+    best = available.argmax(axis=1)
+    codes = np.where(available.any(axis=1), best, -1)
+    if values.shape[1] == 1:
+        codes = np.where(codes == 0, STATUS_CATEGORIES.index('sin estado'), -1)
+    coalesced = values[np.arange(values.shape[0]), best].astype(np.float32)
+    return pd.DataFrame({
+        param: coalesced,
+        f'{param}{STATUS_SUFFIX}': pd.Categorical.from_codes(codes.astype(np.int8), categories=STATUS_CATEGORIES),
+    }, index=param_df.index)
 
 
-def get_minma_data(param_list, station, from_last=None, to_date=-1, n_cols = 5):
+def read_minma_file(station, param, n_cols=5, use_cache=True, start=None, end=None, layout='wide'):
+    """Lee el CSV de un parámetro de MINMA y lo indexa por fecha y hora.
+    Si 'use_cache' es verdadero, el resultado se sirve y se guarda en el
+    caché en disco 'minma_cache'. Si se indica un período y el archivo no
+    está en caché, solo se leen los bytes que contienen ese período.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param : str
+        str con el parámetro monitoreado.
+    n_cols : int
+        Cantidad de columnas a leer del archivo. Si es None, se
+        detecta desde el encabezado.
+    use_cache : bool
+        Condición para utilizar el caché en disco.
+    start : pd.Timestamp (optional)
+        Primera fecha a considerar.
+    end : pd.Timestamp (optional)
+        Última fecha a considerar.
+    layout : str
+        'wide' entrega las columnas de estado con sufijo '_{param}', y
+        'coalesced' las resume con 'coalesce_status'.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con un DatetimeIndex y las columnas del parámetro.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout debe ser uno de {LAYOUTS}, no '{layout}'")
+    param_df = read_minma_wide(station, param, n_cols, use_cache, start, end)
+    if layout == 'coalesced':
+        return coalesce_status(param_df, param)
+    return param_df
+
+
+def read_minma_wide(station, param, n_cols, use_cache, start, end):
+    """Lee el CSV de un parámetro de MINMA con todas sus columnas, desde el
+    caché en disco si está disponible, desde las filas del período con el
+    índice de filas del archivo, o completo en otro caso.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param : str
+        str con el parámetro monitoreado.
+    n_cols : int
+        Cantidad de columnas a leer del archivo. Si es None, se
+        detecta desde el encabezado.
+    use_cache : bool
+        Condición para utilizar el caché en disco.
+    start : pd.Timestamp
+        Primera fecha a considerar, o None.
+    end : pd.Timestamp
+        Última fecha a considerar, o None.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con un DatetimeIndex y las columnas del archivo con
+        sufijo '_{param}'.
+    """
+    path = get_minma_path(station, param)
+    if n_cols is None:
+        n_cols = detect_n_cols(path)
+    windowed = start is not None or end is not None
+    if use_cache:
+        filters = None
+        if windowed:
+            filters = [(INDEX_COLUMN, op, stamp) for op, stamp in (('>=', start), ('<=', end)) if stamp is not None]
+        param_df = minma_cache.get(path, filters=filters, n_cols=n_cols)
+        if param_df is not None:
+            return param_df.loc[start:end]
+    if windowed:
+        row_index = get_row_index(path)
+        # Una ventana grande se lee completa para dejar el archivo en caché.
+        if row_index is not None and (not use_cache or window_fraction(row_index, start, end) < PUSHDOWN_MAX_FRACTION):
+            param_df = read_row_range(path, row_index, start, end, n_cols).add_suffix(f'_{param}')
+            adjust_index(param_df)
+            return param_df.loc[start:end]
+    param_df = pd.read_csv(path,
+                            sep=';',
+                            usecols=range(n_cols),
+                            index_col=[0,1],
+                            decimal=','
+                            ).add_suffix(f'_{param}')
+    adjust_index(param_df)
+    if use_cache:
+        minma_cache.put(path, param_df, row_group_size=CACHE_ROW_GROUP_SIZE, n_cols=n_cols)
+    return param_df.loc[start:end]
+
+
+def common_date_range(station, param_list):
+    """Entrega la primera y la última fecha presentes en todos los archivos
+    de una estación, leyendo solo sus índices de filas.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param_list : list[str]
+        list con parámetros monitoreados a utilizar.
+
+    Returns
+    -------
+    tuple or None
+        tuple con la mayor de las primeras fechas y la menor de las
+        últimas fechas de cada archivo, o None si algún archivo no se
+        pudo indexar.
+    """
+    row_indexes = [get_row_index(get_minma_path(station, param)) for param in param_list]
+    if any(row_index is None for row_index in row_indexes):
+        return None
+    return (pd.Timestamp(max(row_index['first_stamp'] for row_index in row_indexes)),
+            pd.Timestamp(min(row_index['last_stamp'] for row_index in row_indexes)))
+
+
+def get_minma_data(param_list, station, from_last=None, to_date=-1, n_cols = 5, use_cache=True, how='inner', layout='wide'):
     """Recibe una lista de parámetros para una estación y entrega
     un DataFrame con datos dentro de algún período.
     Parameters
@@ -38,49 +276,359 @@ def get_minma_data(param_list, station, from_last=None, to_date=-1, n_cols = 5):
         str indicando el tiempo hacia atrás a considerar.
     to_date : str
         str indicando la fecha hacia el presente a considerar.
+    n_cols : int
+        Cantidad de columnas a leer de cada archivo.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+    how : str
+        Tipo de unión entre parámetros: 'inner', 'outer' o 'grid'.
+    layout : str
+        Formato de las columnas de cada parámetro, ver 'read_minma_file'.
     Returns
     -------
     pd.DataFrame
         pd.DataFrame con datos de cada parámetro para alguna estación.       
     """        
-    param_df_list = []
-    for param in param_list:
-        path = get_project_root() / 'data' / 'raw' / station / f'{station}_{param}.csv'
-        param_df = pd.read_csv(path,
-                                sep=';',
-                                usecols=range(n_cols),
-                                index_col=[0,1],
-                                decimal=','
-                                ).add_suffix(f'_{param}')
-        param_df_list.append(param_df)
-    station_df = reduce(lambda  left,right: pd.merge(left,right,on=['FECHA (YYMMDD)', 'HORA (HHMM)']), param_df_list)
-    adjust_index(station_df)
+    end = None
+    if to_date != -1:
+        end = pd.Timestamp(to_date)
+    elif from_last != None:
+        date_range = common_date_range(station, param_list)
+        if date_range is not None:
+            end = date_range[1]
+    while True:
+        start = None
+        if from_last != None and end is not None:
+            start = end - pd.Timedelta(from_last)
+        station_df = read_station_window(station, param_list, n_cols, use_cache, start, end, how, layout)
+        # Sin 'to_date', el período termina en la última hora común a todos los
+        # parámetros; si es anterior a la estimada se vuelve a leer.
+        if to_date != -1 or end is None or station_df.empty or station_df.index[-1] == end:
+            break
+        end = station_df.index[-1]
+    return select_window(station_df, from_last, to_date)
+
+
+def select_window(data_df, from_last=None, to_date=-1):
+    """Filtra un DataFrame indexado por fechas a un período que termina
+    en 'to_date' y se extiende 'from_last' hacia atrás.
+
+    Parameters
+    ----------
+    data_df : pd.DataFrame
+        DataFrame con un DatetimeIndex ordenado.
+    from_last : str
+        str indicando el tiempo hacia atrás a considerar.
+    to_date : str
+        str indicando la fecha hacia el presente a considerar. Con -1
+        se utiliza el último registro.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame filtrado al período solicitado.
+    """
+    if data_df.empty:
+        return data_df
     if to_date == -1:
-        to_date = station_df.index[-1]
+        to_date = data_df.index[-1]
+    to_date = pd.Timestamp(to_date)
     from_date = None
     if from_last != None:
         from_date = to_date - pd.Timedelta(from_last)
-    return station_df.loc[from_date:to_date]
+    return data_df.loc[from_date:to_date]
+
+
+def iter_minma_data(param_list, station, chunk='30D', from_last=None, to_date=-1, n_cols=5, use_cache=True, how='inner', layout='wide'):
+    """Recorre en orden temporal los datos de una estación en bloques de
+    largo 'chunk', leyendo de cada archivo solo las filas de cada bloque.
+    Los bloques comienzan a medianoche, por lo que con un largo múltiplo
+    de un día ningún día queda repartido entre dos bloques.
+
+    Parameters
+    ----------
+    param_list : list[str]
+        list con parámetros monitoreados a utilizar.
+    station : str
+        str con nombre de la estación de interés.
+    chunk : str
+        str con el largo de cada bloque.
+    from_last : str
+        str indicando el tiempo hacia atrás a considerar.
+    to_date : str
+        str indicando la fecha hacia el presente a considerar.
+    n_cols : int
+        Cantidad de columnas a leer de cada archivo.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+    how : str
+        Tipo de unión entre parámetros: 'inner', 'outer' o 'grid'.
+    layout : str
+        Formato de las columnas de cada parámetro, ver 'read_minma_file'.
+
+    Yields
+    ------
+    pd.DataFrame
+        pd.DataFrame con el mismo formato que 'get_minma_data' para cada
+        bloque no vacío.
+    """
+    date_range = common_date_range(station, param_list)
+    if date_range is None:
+        # Sin índice de filas no es posible leer por bloques.
+        station_df = get_minma_data(param_list, station, from_last, to_date, n_cols, use_cache, how, layout)
+        for _, chunk_df in station_df.groupby(pd.Grouper(freq=chunk, origin='start_day')):
+            if not chunk_df.empty:
+                yield chunk_df
+        return
+
+    first, end = date_range
+    chunk = pd.Timedelta(chunk)
+    if to_date != -1:
+        end = pd.Timestamp(to_date)
+    else:
+        # La última hora común a todos los parámetros puede ser anterior a la
+        # última hora de cada archivo.
+        while end >= first:
+            tail_df = read_station_window(station, param_list, n_cols, use_cache, end - chunk, end, how, layout)
+            if not tail_df.empty:
+                end = tail_df.index[-1]
+                break
+            end = end - chunk
+    start = first
+    if from_last != None:
+        start = max(first, end - pd.Timedelta(from_last))
+
+    for chunk_start in pd.date_range(start.floor('D'), end, freq=chunk):
+        chunk_end = chunk_start + chunk - pd.Timedelta(1)
+        chunk_df = read_station_window(station, param_list, n_cols, use_cache,
+                                       max(chunk_start, start), min(chunk_end, end), how, layout)
+        if not chunk_df.empty:
+            yield chunk_df
+
+
+def join_params(param_df_list, how='inner'):
+    """Une los DataFrames de varios parámetros en una sola pasada,
+    ubicando cada uno sobre un índice común dentro de un único arreglo.
+
+    Parameters
+    ----------
+    param_df_list : list
+        list de DataFrames con DatetimeIndex ordenado y sin duplicados.
+    how : str
+        Tipo de unión: 'inner' conserva las horas presentes en todos los
+        parámetros, 'outer' las presentes en alguno y 'grid' todas las
+        horas entre el primer y el último registro.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame con las columnas de todos los parámetros, con NaN donde
+        un parámetro no tiene registro.
+    """
+    indexes = [df.index for df in param_df_list]
+    if how == 'grid' and all(idx.empty for idx in indexes):
+        how = 'outer'
+    if how == 'inner':
+        index = reduce(lambda left, right: left.intersection(right), indexes)
+    elif how == 'outer':
+        index = reduce(lambda left, right: left.union(right), indexes)
+    elif how == 'grid':
+        index = pd.date_range(min(idx.min() for idx in indexes if not idx.empty),
+                              max(idx.max() for idx in indexes if not idx.empty),
+                              freq=pd.Timedelta(hours=1))
+    else:
+        raise ValueError(f"how debe ser 'inner', 'outer' o 'grid', no '{how}'")
+
+    columns = [col for df in param_df_list for col in df.columns]
+    float_dtypes = [dtype for df in param_df_list for dtype in df.dtypes if dtype.kind == 'f']
+    float_dtype = np.result_type(*float_dtypes) if float_dtypes else np.float64
+    # En orden 'F' cada columna es contigua y pandas la adopta sin copiarla.
+    values = np.full((index.shape[0], len(float_dtypes)), np.nan, dtype=float_dtype, order='F')
+    float_columns, other_columns = [], []
+    stamps = np.asarray(index.values, dtype='datetime64[ns]').view(np.int64)
+    for df in param_df_list:
+        df_stamps = np.asarray(df.index.values, dtype='datetime64[ns]').view(np.int64)
+        positions = np.minimum(np.searchsorted(stamps, df_stamps), max(stamps.shape[0] - 1, 0))
+        found = stamps[positions] == df_stamps if stamps.shape[0] else np.zeros(df.shape[0], dtype=bool)
+        for col, dtype in df.dtypes.items():
+            if dtype.kind == 'f':
+                values[positions[found], len(float_columns)] = df[col].to_numpy()[found]
+                float_columns.append(col)
+            else:
+                other_columns.append((col, take_into(df[col], positions[found], found, index.shape[0])))
+    joined_df = pd.DataFrame(values, index=index, columns=float_columns, copy=False)
+    for col, column_values in other_columns:
+        joined_df.insert(columns.index(col), col, column_values)
+    return joined_df
+
+
+def take_into(series, positions, found, size):
+    """Ubica los valores encontrados de una columna no numérica en un
+    arreglo de largo 'size', con valores faltantes en el resto."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = np.full(size, -1, dtype=series.cat.codes.dtype)
+        codes[positions] = series.cat.codes.to_numpy()[found]
+        return pd.Categorical.from_codes(codes, dtype=series.dtype)
+    column_values = np.full(size, None, dtype=object)
+    column_values[positions] = series.to_numpy()[found]
+    return column_values
+
+
+def read_station_window(station, param_list, n_cols, use_cache, start, end, how='inner', layout='wide'):
+    """Lee y une los parámetros de una estación entre 'start' y 'end'.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param_list : list[str]
+        list con parámetros monitoreados a utilizar.
+    n_cols : int
+        Cantidad de columnas a leer de cada archivo.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+    start : pd.Timestamp
+        Primera fecha a considerar.
+    end : pd.Timestamp
+        Última fecha a considerar.
+    how : str
+        Tipo de unión entre parámetros, ver 'join_params'.
+    layout : str
+        Formato de las columnas de cada parámetro, ver 'read_minma_file'.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con los parámetros unidos según 'how'.
+    """
+    param_df_list = [read_minma_file(station, param, n_cols, use_cache, start, end, layout) for param in param_list]
+    return join_params(param_df_list, how)
+
+
+def get_multi_station_data(stations, params, from_last=None, to_date=-1, n_cols=None, max_workers=None, use_cache=True,
+                           layout='wide'):
+    """Lee en paralelo los parámetros de varias estaciones y los entrega
+    en un único DataFrame sobre una grilla horaria común.
+
+    Parameters
+    ----------
+    stations : list[str]
+        list con nombres de las estaciones de interés.
+    params : list[str] or dict
+        list con parámetros a leer en todas las estaciones, o dict que
+        asocia cada estación con su propia lista de parámetros.
+    from_last : str
+        str indicando el tiempo hacia atrás a considerar.
+    to_date : str
+        str indicando la fecha hacia el presente a considerar.
+    n_cols : int
+        Cantidad de columnas a leer de cada archivo. Si es None, se
+        detecta desde el encabezado de cada archivo.
+    max_workers : int
+        Cantidad de procesos a utilizar. Con 1 se lee de forma secuencial.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+    layout : str
+        Formato de las columnas de cada parámetro, ver 'read_minma_file'.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con columnas MultiIndex (estación, columna) indexado
+        por hora, con NaN en las horas sin registro.
+    """
+    if not isinstance(params, dict):
+        params = {station: params for station in stations}
+    tasks = [(station, param) for station in stations for param in params[station]]
+    task_stations, task_params = zip(*tasks)
+    if max_workers == 1:
+        param_df_list = list(map(read_minma_file, task_stations, task_params, repeat(n_cols), repeat(use_cache),
+                                 repeat(None), repeat(None), repeat(layout)))
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            param_df_list = list(executor.map(read_minma_file, task_stations, task_params, repeat(n_cols), repeat(use_cache),
+                                              repeat(None), repeat(None), repeat(layout)))
+
+    # Los archivos sin registros quedan como columnas vacías.
+    empty_tasks = [task for task, df in zip(tasks, param_df_list) if df.empty]
+    if empty_tasks:
+        warnings.warn(f'Sin registros para (estación, parámetro): {empty_tasks}')
+    non_empty = [df for df in param_df_list if not df.empty]
+    if non_empty:
+        hourly_index = pd.date_range(min(df.index[0] for df in non_empty),
+                                     max(df.index[-1] for df in non_empty),
+                                     freq=pd.Timedelta(hours=1))
+    else:
+        hourly_index = pd.DatetimeIndex([])
+    network_df = pd.concat([df.reindex(hourly_index) for df in param_df_list],
+                           axis=1,
+                           keys=task_stations)
+    return select_window(network_df, from_last, to_date)
 
 def main():
     parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
-    parser.add_argument("filename", type=str, help="Output filename")
-    parser.add_argument("station", type=str, help="Station name")
-    parser.add_argument("-p", "--param", nargs='+', help="List of parameters", required=True)
+    parser.add_argument("filename", type=str, nargs='?', help="Output filename")
+    parser.add_argument("station", type=str, nargs='?', help="Station name")
+    parser.add_argument("-p", "--param", nargs='+', help="List of parameters")
     parser.add_argument("--from_last", default=None, type=str, help="Check last period")
     parser.add_argument("--to_date", default=-1, help="Check till period")
+    parser.add_argument("--no_cache", action='store_true', help="Bypass the parsed CSV cache")
+    parser.add_argument("--clear_cache", action='store_true', help="Clear the parsed CSV cache before building")
+    parser.add_argument("--incremental", action='store_true', help="Only parse rows added or changed since the last run")
+    parser.add_argument("--format", default=None, choices=['pickle', 'parquet'],
+                        help="Output format: a single pickle (when omitted) or a Parquet dataset partitioned by "
+                             "station/year. Not valid with --batch, where each dataset sets its own format")
+    parser.add_argument("--batch", nargs='?', const='data/datasets.json', metavar='MANIFEST',
+                        help="Build every dataset listed in a JSON manifest, skipping the unchanged ones")
+    parser.add_argument("--force", action='store_true', help="Rebuild every dataset of the manifest")
+    parser.add_argument("-j", "--max_workers", default=None, type=int, help="Processes used by --batch")
     args = vars(parser.parse_args())
 
+    if args['clear_cache']:
+        minma_cache.clear()
+
+    # Las opciones que un modo no puede respetar se rechazan en lugar de ignorarse.
+    if args['batch'] is not None and args['format'] is not None:
+        parser.error("--format cannot be used with --batch, set 'format' for each dataset in the manifest")
+    if args['batch'] is not None and args['incremental']:
+        parser.error("--incremental cannot be used with --batch")
+    if args['incremental'] and args['format'] == 'parquet':
+        parser.error("--incremental only writes pickle datasets")
+
+    if args['batch'] is not None:
+        from src.data.batch import format_summary, load_manifest, run_batch
+        t0 = perf_counter()
+        summaries = run_batch(load_manifest(args['batch']), args['max_workers'], args['force'],
+                              use_cache=not args['no_cache'])
+        print(format_summary(summaries, perf_counter() - t0))
+        if any(summary['status'] == 'error' for summary in summaries):
+            sys.exit(1)
+        return
+    if args['filename'] is None or args['station'] is None or args['param'] is None:
+        parser.error("filename, station and --param are required unless --batch is given")
+
     filename = args['filename']
     station = args['station']
     params = args['param']
     from_last = args['from_last']
     to_date = args['to_date']
+    use_cache = not args['no_cache']
 
     output_dataset = os.path.join("data", 'processed', f"{filename}.pkl")
 
-    dataset = get_minma_data(params, station, from_last, to_date)
+    if args['incremental']:
+        from src.data.ingest import ingest_incremental
+        summary = ingest_incremental(output_dataset, params, station, from_last, to_date, use_cache=use_cache)
+        print(f"{output_dataset}: {summary['mode']} - desde {summary['from']} - "
+              f"{summary['appended']} filas nuevas, {summary['revalidated']} revalidadas")
+        return
+
+    dataset = get_minma_data(params, station, from_last, to_date, use_cache=use_cache)
 
+    if args['format'] == 'parquet':
+        from src.data.store import write_partitioned
+        write_partitioned(dataset, os.path.join("data", 'processed', filename), station)
+        return
     dataset.to_pickle(output_dataset)
 
 if __name__ == '__main__':
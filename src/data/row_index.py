@@ -0,0 +1,166 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from src.data.cache import minma_cache
+
+INDEX_STRIDE = 256
+ROW_PREFIX_LEN = 12
+DIGIT_POSITIONS = [0, 1, 2, 3, 4, 5, 7, 8, 9, 10]
+SEPARATOR_POSITIONS = [6, 11]
+
+
+def build_row_index(path, stride=INDEX_STRIDE, century_pivot=90):
+    """Recorre los bytes de un CSV de MINMA y construye un índice disperso
+    que asocia la fecha de cada 'stride' filas con su posición en el
+    archivo. Solo se decodifican los campos de fecha y hora, sin parsear
+    los valores.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo CSV.
+    stride : int
+        Cantidad de filas entre dos entradas del índice.
+    century_pivot : int
+        Año de dos dígitos desde el cual se considera el siglo XX.
+
+    Returns
+    -------
+    dict or None
+        dict con los arreglos 'offsets' y 'stamps' de las filas muestreadas,
+        junto con 'header_end', 'end_offset', 'first_stamp', 'last_stamp' y
+        'n_rows'. Entrega None si el archivo no tiene el formato esperado
+        o sus filas no están ordenadas en el tiempo.
+    """
+    from src.data.make_dataset import decode_minma_index
+
+    buf = np.fromfile(path, dtype=np.uint8)
+    line_starts = np.flatnonzero(buf == ord('\n')) + 1
+    if line_starts.shape[0] == 0:
+        return None
+    row_starts = line_starts[line_starts < buf.shape[0]]
+    if row_starts.shape[0] == 0:
+        return None
+    padded = np.concatenate([buf, np.zeros(ROW_PREFIX_LEN, dtype=np.uint8)])
+    prefixes = padded[row_starts[:, None] + np.arange(ROW_PREFIX_LEN)]
+    digits = prefixes[:, DIGIT_POSITIONS].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any() or (prefixes[:, SEPARATOR_POSITIONS] != ord(';')).any():
+        return None
+    dates = digits[:, :6] @ 10 ** np.arange(5, -1, -1)
+    hours = digits[:, 6:] @ 10 ** np.arange(3, -1, -1)
+    stamps = decode_minma_index(dates, hours, century_pivot).values
+    if (np.diff(stamps) <= np.timedelta64(0)).any():
+        return None
+    sampled = np.arange(0, row_starts.shape[0], stride)
+    return {
+        'offsets': row_starts[sampled],
+        'stamps': stamps[sampled],
+        'header_end': np.int64(line_starts[0]),
+        'end_offset': np.int64(buf.shape[0]),
+        'first_stamp': stamps[0],
+        'last_stamp': stamps[-1],
+        'n_rows': np.int64(row_starts.shape[0]),
+    }
+
+
+def get_row_index(path, stride=INDEX_STRIDE):
+    """Entrega el índice de filas de un CSV de MINMA, sirviéndolo desde el
+    caché en disco cuando existe. Al ser metadatos livianos que se
+    invalidan con el archivo, el índice se guarda aunque se omita el
+    caché de datos procesados.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo CSV.
+    stride : int
+        Cantidad de filas entre dos entradas del índice.
+
+    Returns
+    -------
+    dict or None
+        dict con el índice del archivo, o None si no se pudo construir.
+    """
+    row_index = minma_cache.get_arrays(path, kind='row_index', stride=stride)
+    if row_index is not None:
+        return row_index if row_index['n_rows'] > 0 else None
+    row_index = build_row_index(path, stride)
+    # Un índice vacío registra que el archivo no se puede indexar.
+    minma_cache.put_arrays(path, row_index or {'n_rows': np.int64(0)}, kind='row_index', stride=stride)
+    return row_index
+
+
+def window_fraction(row_index, start=None, end=None):
+    """Estima la fracción de filas del archivo que caen dentro de un período.
+
+    Parameters
+    ----------
+    row_index : dict
+        Índice entregado por 'build_row_index'.
+    start : pd.Timestamp (optional)
+        Inicio del período.
+    end : pd.Timestamp (optional)
+        Término del período.
+
+    Returns
+    -------
+    float
+        Fracción aproximada de filas dentro del período.
+    """
+    first, last = _sample_range(row_index, start, end)
+    return min(1.0, (last - first + 1) / row_index['stamps'].shape[0])
+
+
+def _sample_range(row_index, start, end):
+    stamps = row_index['stamps']
+    first = 0
+    if start is not None:
+        first = max(0, np.searchsorted(stamps, np.datetime64(start, 'ns'), side='right') - 1)
+    last = stamps.shape[0] - 1
+    if end is not None:
+        last = np.searchsorted(stamps, np.datetime64(end, 'ns'), side='right') - 1
+    return first, last
+
+
+def read_row_range(path, row_index, start=None, end=None, n_cols=5):
+    """Lee solo el bloque de bytes de un CSV de MINMA que contiene las
+    filas entre 'start' y 'end'.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo CSV.
+    row_index : dict
+        Índice entregado por 'build_row_index'.
+    start : pd.Timestamp (optional)
+        Inicio del período.
+    end : pd.Timestamp (optional)
+        Término del período.
+    n_cols : int
+        Cantidad de columnas a leer del archivo.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con el mismo formato que entrega 'pd.read_csv' sobre
+        el archivo completo, restringido al bloque leído.
+    """
+    offsets = row_index['offsets']
+    first, last = _sample_range(row_index, start, end)
+    byte_start = offsets[first]
+    byte_end = offsets[last + 1] if last + 1 < offsets.shape[0] else row_index['end_offset']
+    with open(path, 'rb') as f:
+        header = f.read(int(row_index['header_end']))
+        if last < first:
+            block = b''
+        else:
+            f.seek(int(byte_start))
+            block = f.read(int(byte_end - byte_start))
+    block_df = pd.read_csv(io.BytesIO(header + block),
+                           sep=';',
+                           usecols=range(n_cols),
+                           index_col=[0,1],
+                           decimal=',')
+    return block_df.astype('float64')
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from src.data.cache import has_pyarrow
+
+DATE_COLUMN = 'fecha'
+PARTITION_COLUMNS = ['station', 'year']
+
+
+def parquet_compression():
+    """Entrega la mejor compresión de Parquet disponible.
+
+    Returns
+    -------
+    str
+        'zstd' si pyarrow la soporta, o 'snappy' en otro caso.
+    """
+    import pyarrow as pa
+    return 'zstd' if pa.Codec.is_available('zstd') else 'snappy'
+
+
+def write_partitioned(dataset, path, station, row_group_size=None):
+    """Guarda los datos de una estación en un dataset Parquet particionado
+    por estación y año ('station=<estación>/year=<año>'), comprimido y con
+    estadísticas por columna. Todas las particiones existentes de la
+    estación se reemplazan, incluso los años que no están en 'dataset', y
+    las de otras estaciones se conservan.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        DataFrame con DatetimeIndex, como el que entrega 'get_minma_data'.
+    path : str or Path
+        Directorio raíz del dataset.
+    station : str
+        str con nombre de la estación.
+    row_group_size : int (optional)
+        Cantidad de filas por 'row group'. Por defecto se escribe uno por
+        año, ya que 'row groups' más chicos hacen más lenta la lectura y
+        los filtros por fecha ya descartan años completos.
+    """
+    if not has_pyarrow():
+        raise ImportError('Se necesita pyarrow para guardar datasets particionados.')
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    station_df = dataset.rename_axis(DATE_COLUMN).reset_index()
+    station_df['year'] = station_df[DATE_COLUMN].dt.year
+    table = pa.Table.from_pandas(station_df, preserve_index=False)
+    table = table.append_column('station', pa.array([station] * table.num_rows, pa.string()))
+    os.makedirs(path, exist_ok=True)
+    station_path = os.path.join(path, f'station={station}')
+    # Se escribe en un directorio temporal dentro del dataset y luego se
+    # reemplaza la estación completa, de modo que no queden años de una
+    # escritura anterior más larga. Los nombres con '.' son ignorados al
+    # leer el dataset.
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=path)
+    try:
+        pq.write_to_dataset(table,
+                            tmp_dir,
+                            partition_cols=PARTITION_COLUMNS,
+                            basename_template='part-{i}.parquet',
+                            compression=parquet_compression(),
+                            write_statistics=True,
+                            row_group_size=row_group_size)
+        old_path = os.path.join(tmp_dir, 'old')
+        if os.path.exists(station_path):
+            os.replace(station_path, old_path)
+        os.replace(os.path.join(tmp_dir, f'station={station}'), station_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def read_partitioned(path, stations=None, columns=None, start=None, end=None):
+    """Lee un dataset creado con 'write_partitioned', leyendo solo las
+    columnas y los años necesarios y filtrando las fechas durante la
+    lectura.
+
+    Parameters
+    ----------
+    path : str or Path
+        Directorio raíz del dataset.
+    stations : str or list (optional)
+        Estación o lista de estaciones a leer. Por defecto todas.
+    columns : list (optional)
+        Columnas a leer. Por defecto todas.
+    start : str or pd.Timestamp (optional)
+        Primera fecha a considerar.
+    end : str or pd.Timestamp (optional)
+        Última fecha a considerar.
+
+    Returns
+    -------
+    pd.DataFrame
+        Con una estación dada como str, DataFrame indexado por fecha con
+        el mismo formato que 'get_minma_data'. En otro caso, DataFrame con
+        columnas MultiIndex (estación, columna) como el que entrega
+        'get_multi_station_data'.
+    """
+    import pyarrow.parquet as pq
+
+    if isinstance(stations, str):
+        station_list = [stations]
+    elif stations is None:
+        station_list = sorted(name.split('=', 1)[1] for name in os.listdir(path) if name.startswith('station='))
+    else:
+        station_list = list(stations)
+    filters = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        filters += [('year', '>=', start.year), (DATE_COLUMN, '>=', start)]
+    if end is not None:
+        end = pd.Timestamp(end)
+        filters += [('year', '<=', end.year), (DATE_COLUMN, '<=', end)]
+
+    station_dfs = {}
+    for station in station_list:
+        # Cada estación se lee por separado, ya que sus columnas pueden ser
+        # distintas a las de otras estaciones.
+        station_path = os.path.join(path, f'station={station}')
+        read_columns = None
+        if columns is not None:
+            names = pq.ParquetDataset(station_path).schema.names
+            read_columns = [DATE_COLUMN] + [col for col in columns if col in names]
+        station_df = pd.read_parquet(station_path, columns=read_columns, filters=filters or None)
+        station_dfs[station] = (station_df.drop(columns='year', errors='ignore')
+                                .set_index(DATE_COLUMN)
+                                .rename_axis(None)
+                                .sort_index())
+    if isinstance(stations, str):
+        return station_dfs[stations]
+    return pd.concat(station_dfs, axis=1)
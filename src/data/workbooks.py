@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+
+from src.data.cache import minma_cache
+from src.utils import get_project_root
+
+RAW_DIR = get_project_root() / 'data' / 'raw'
+CEMS_PATH = RAW_DIR / 'CEMS industrial datos Quintero.xlsx'
+METEO_TOWER_PATHS = [RAW_DIR / 'Torre Meteo Codelco Ventanas.xlsx', RAW_DIR / 'Torre_Meteo_Codelco_Ventanas.xlsx']
+
+
+def read_workbook(path, use_cache=True, **read_options):
+    """Lee una planilla Excel indexada por fecha. La primera lectura se
+    guarda en el caché en disco 'minma_cache', por lo que las siguientes
+    no vuelven a procesar el archivo mientras este no cambie.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta al archivo Excel.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+    **read_options
+        Opciones de 'pd.read_excel'. La primera columna leída debe ser
+        la fecha, o indicarse con 'index_col'.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con un DatetimeIndex ordenado.
+    """
+    if use_cache:
+        cached_df = minma_cache.get(path, kind='excel', **read_options)
+        if cached_df is not None:
+            return cached_df
+    sheet_df = pd.read_excel(path, **read_options)
+    if 'index_col' not in read_options:
+        sheet_df = sheet_df.set_index(sheet_df.columns[0])
+    sheet_df.index = pd.to_datetime(sheet_df.index)
+    sheet_df.columns = sheet_df.columns.astype(str)
+    sheet_df = sheet_df.sort_index()
+    if use_cache:
+        minma_cache.put(path, sheet_df, kind='excel', **read_options)
+    return sheet_df
+
+
+def read_cems(path=CEMS_PATH, use_cache=True):
+    """Lee las emisiones horarias de SO2 de los CEMS industriales de
+    Quintero, en mg/m3.
+
+    Parameters
+    ----------
+    path : str or Path
+        Ruta a la planilla de los CEMS.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con una columna por fuente, indexado por fecha.
+    """
+    return read_workbook(path, use_cache, index_col=0, skiprows=2)
+
+
+def read_meteo_tower(path=None, use_cache=True):
+    """Lee los datos de la torre meteorológica de Codelco Ventanas y agrega
+    las diferencias de temperatura entre alturas, usadas como indicador de
+    estabilidad atmosférica: 'T_diff' (T_40 - T_20) y 'T_grad', el
+    gradiente entre 10 y 40 metros en °C cada 100 metros.
+
+    Parameters
+    ----------
+    path : str or Path (optional)
+        Ruta a la planilla de la torre. Por defecto se busca en 'data/raw'.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con los datos de la torre, indexado por fecha.
+    """
+    if path is None:
+        existing = [candidate for candidate in METEO_TOWER_PATHS if os.path.exists(candidate)]
+        if not existing:
+            raise FileNotFoundError(f'No se encontró la planilla de la torre meteorológica en {RAW_DIR}')
+        path = existing[0]
+    meteo_df = read_workbook(path, use_cache)
+    if {'T_40', 'T_20'} <= set(meteo_df.columns):
+        meteo_df['T_diff'] = meteo_df['T_40'] - meteo_df['T_20']
+    if {'T_40', 'T_10'} <= set(meteo_df.columns):
+        meteo_df['T_grad'] = 100 * (meteo_df['T_40'] - meteo_df['T_10']) / 30
+    return meteo_df
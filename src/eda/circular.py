@@ -0,0 +1,161 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Columnas de dirección en grados: 'dirviento', 'dirviento10', las columnas
+# del formato 'wide' como 'Registros validados_dirviento' y las de la torre
+# meteorológica como 'WD_20'. 'SigDir' es una desviación y no es circular.
+DIRECTION_PATTERN = re.compile(r'(^|_)(dirviento\d*|WD(_\d+)?)$')
+COMPASS_LABELS = {
+    4: ['N', 'E', 'S', 'O'],
+    8: ['N', 'NE', 'E', 'SE', 'S', 'SO', 'O', 'NO'],
+    16: ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSO', 'SO', 'OSO', 'O', 'ONO', 'NO', 'NNO'],
+}
+CIRCULAR_STATS = ['mean', 'std', 'R', 'count']
+
+
+def is_direction_column(column):
+    """Indica si una columna contiene direcciones en grados, según su
+    nombre. En columnas MultiIndex se considera el último nivel."""
+    if isinstance(column, tuple):
+        column = column[-1]
+    return bool(DIRECTION_PATTERN.search(str(column)))
+
+
+def direction_columns(df):
+    """Entrega las columnas de dirección de un DataFrame."""
+    return [col for col in df.columns if is_direction_column(col)]
+
+
+def circular_sums(values, axis=0):
+    """Suma de senos y cosenos de ángulos en grados y cantidad de valores
+    válidos a lo largo de un eje, ignorando los NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    radians = np.deg2rad(np.where(valid, values, 0))
+    sin = np.where(valid, np.sin(radians), 0).sum(axis=axis)
+    cos = np.where(valid, np.cos(radians), 0).sum(axis=axis)
+    return sin, cos, valid.sum(axis=axis)
+
+
+def stats_from_sums(sin, cos, count, stat):
+    """Estadístico circular a partir de las sumas de 'circular_sums'."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        length = np.hypot(sin, cos) / count
+        if stat == 'mean':
+            result = np.rad2deg(np.arctan2(sin, cos)) % 360
+            # Un ángulo negativo muy pequeño queda en 360 al redondear.
+            result = np.where(result >= 360, 0.0, result)
+        elif stat == 'R':
+            result = length
+        elif stat == 'std':
+            result = np.rad2deg(np.sqrt(np.maximum(-2 * np.log(length), 0)))
+        elif stat == 'count':
+            return np.asarray(count, dtype=np.float64)
+        else:
+            raise ValueError(f"Estadístico circular desconocido: '{stat}', debe ser uno de {CIRCULAR_STATS}")
+    return np.where(count > 0, result, np.nan)
+
+
+def circmean(values, axis=0):
+    """Promedio circular en grados, entre 0 y 360, ignorando los NaN.
+
+    Parameters
+    ----------
+    values : np.array or pd.DataFrame
+        Direcciones en grados.
+    axis : int
+        Eje sobre el cual promediar.
+
+    Returns
+    -------
+    np.array
+        Promedio circular, con NaN donde no hay valores válidos.
+    """
+    return stats_from_sums(*circular_sums(values, axis), 'mean')
+
+
+def resultant_length(values, axis=0):
+    """Largo medio del vector resultante, entre 0 (direcciones dispersas) y
+    1 (todas iguales), ignorando los NaN."""
+    return stats_from_sums(*circular_sums(values, axis), 'R')
+
+
+def circstd(values, axis=0):
+    """Desviación estándar circular en grados, sqrt(-2 ln R), ignorando los
+    NaN. Coincide con 'scipy.stats.circstd' con high=360."""
+    return stats_from_sums(*circular_sums(values, axis), 'std')
+
+
+def circular_groupby(data, by, stats='mean'):
+    """Estadísticos circulares por grupo, con una sola agregación de pandas
+    sobre los senos y cosenos.
+
+    Parameters
+    ----------
+    data : pd.Series or pd.DataFrame
+        Direcciones en grados.
+    by : object
+        Cualquier agrupación aceptada por 'groupby', por ejemplo
+        pd.Grouper(freq='D') para remuestrear, o una lista de arreglos.
+    stats : str or list
+        'mean', 'std', 'R' o 'count', o una lista de ellos.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Resultado con un grupo por fila. Con una lista de estadísticos las
+        columnas son MultiIndex (columna, estadístico), como en 'agg'.
+    """
+    is_series = isinstance(data, pd.Series)
+    frame = data.to_frame() if is_series else data
+    values = frame.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    radians = np.deg2rad(np.where(valid, values, 0))
+    n_cols = frame.shape[1]
+    parts = pd.DataFrame(np.hstack([np.where(valid, np.sin(radians), 0), np.where(valid, np.cos(radians), 0),
+                                    valid]), index=frame.index)
+    grouped = parts.groupby(by).sum()
+    sums, index = grouped.to_numpy(), grouped.index
+    sin, cos, count = sums[:, :n_cols], sums[:, n_cols:2 * n_cols], sums[:, 2 * n_cols:]
+
+    if isinstance(stats, str):
+        result = pd.DataFrame(stats_from_sums(sin, cos, count, stats), index=index, columns=frame.columns)
+        return result.iloc[:, 0].rename(data.name) if is_series else result
+    columns = pd.MultiIndex.from_tuples([(col, stat) for col in frame.columns for stat in stats])
+    result = np.stack([stats_from_sums(sin, cos, count, stat) for stat in stats], axis=2).reshape(len(index), -1)
+    result = pd.DataFrame(result, index=index, columns=columns)
+    return result.droplevel(0, axis=1) if is_series else result
+
+
+def direction_bins(values, n_bins=16, labels=True):
+    """Clasifica direcciones en sectores de igual ancho centrados en el
+    norte, por ejemplo para una rosa de vientos.
+
+    Parameters
+    ----------
+    values : array-like
+        Direcciones en grados.
+    n_bins : int
+        Cantidad de sectores.
+    labels : bool
+        Condición para usar los puntos cardinales como etiquetas (para 4,
+        8 y 16 sectores). En otro caso se usa el centro del sector en
+        grados.
+
+    Returns
+    -------
+    pd.Categorical
+        Sector de cada dirección, con NaN donde no hay valor.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    width = 360 / n_bins
+    valid = ~np.isnan(values)
+    codes = np.full(values.shape, -1, dtype=np.int64)
+    codes[valid] = (((values[valid] + width / 2) % 360) // width).astype(np.int64) % n_bins
+    if labels and n_bins in COMPASS_LABELS:
+        categories = COMPASS_LABELS[n_bins]
+    else:
+        categories = list(np.arange(n_bins) * width)
+    return pd.Categorical.from_codes(codes.ravel(), categories=categories)
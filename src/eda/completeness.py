@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from src.data.cache import minma_cache
+from src.data.make_dataset import get_minma_path, read_minma_file
+
+GAP_COLUMNS = ['station', 'param', 'start', 'end', 'hours']
+
+
+def hours_to_datetime(hours):
+    return np.asarray(hours, dtype=np.int64).astype('datetime64[h]').astype('datetime64[ns]')
+
+
+def series_completeness(hours):
+    """Calcula las brechas y la cantidad de horas con registro por mes de
+    una serie horaria en una sola pasada.
+
+    Parameters
+    ----------
+    hours : np.array
+        Arreglo ordenado con las horas con registro válido, como horas
+        enteras desde 1970.
+
+    Returns
+    -------
+    dict
+        dict con los arreglos 'gap_starts' y 'gap_lengths' (primera hora y
+        largo en horas de cada brecha entre el primer y el último
+        registro), 'months' (meses desde 1970) y 'month_counts' (horas con
+        registro en cada mes), y las horas 'first' y 'last'.
+    """
+    hours = np.asarray(hours, dtype=np.int64)
+    if not hours.size:
+        empty = np.array([], dtype=np.int64)
+        return {'gap_starts': empty, 'gap_lengths': empty, 'months': empty, 'month_counts': empty,
+                'first': np.int64(-1), 'last': np.int64(-1)}
+    steps = np.diff(hours)
+    breaks = np.flatnonzero(steps > 1)
+    months = hours.astype('datetime64[h]').astype('datetime64[M]').astype(np.int64)
+    # Las horas están ordenadas, por lo que los meses forman bloques contiguos.
+    month_starts = np.concatenate([[0], np.flatnonzero(np.diff(months)) + 1])
+    return {'gap_starts': hours[breaks] + 1, 'gap_lengths': steps[breaks] - 1,
+            'months': months[month_starts], 'month_counts': np.diff(np.append(month_starts, hours.size)),
+            'first': hours[0], 'last': hours[-1]}
+
+
+def file_completeness(station, param, use_cache=True):
+    """Calcula las brechas y horas por mes de un archivo de MINMA, usando
+    el mejor registro disponible de cada hora. El resultado se guarda en
+    el caché en disco mientras el archivo no cambie.
+
+    Parameters
+    ----------
+    station : str
+        str con nombre de la estación de interés.
+    param : str
+        str con el parámetro monitoreado.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    dict
+        dict entregado por 'series_completeness'.
+    """
+    path = get_minma_path(station, param)
+    if use_cache:
+        cached = minma_cache.get_arrays(path, kind='completeness')
+        if cached is not None:
+            return cached
+    values = read_minma_file(station, param, None, use_cache, layout='coalesced')[param]
+    valid_index = values.index[values.notna().to_numpy()]
+    result = series_completeness(valid_index.values.astype('datetime64[h]').astype(np.int64))
+    if use_cache:
+        minma_cache.put_arrays(path, result, kind='completeness')
+    return result
+
+
+def network_completeness(station_params=None, use_cache=True):
+    """Construye el índice de brechas y cobertura mensual de toda la red.
+
+    Parameters
+    ----------
+    station_params : dict (optional)
+        dict que asocia cada estación con sus parámetros. Por defecto se
+        usan todos los archivos de 'data/raw'.
+    use_cache : bool
+        Condición para utilizar el caché en disco de archivos procesados.
+
+    Returns
+    -------
+    tuple
+        tuple con un DataFrame de brechas, con una fila por brecha y
+        columnas 'station', 'param', 'start', 'end' y 'hours', y un
+        DataFrame con la fracción de horas con registro de cada mes,
+        indexado por el inicio del mes y con columnas MultiIndex
+        (estación, parámetro). Los meses sin registros tienen cobertura 0.
+    """
+    if station_params is None:
+        from src.data.cube import list_raw_files
+        station_params = list_raw_files()
+    gap_tables, month_counts = [], {}
+    for station, params in station_params.items():
+        for param in params:
+            result = file_completeness(station, param, use_cache)
+            starts, lengths = result['gap_starts'], result['gap_lengths']
+            gap_tables.append(pd.DataFrame({'station': station, 'param': param,
+                                            'start': hours_to_datetime(starts),
+                                            'end': hours_to_datetime(starts + lengths - 1),
+                                            'hours': lengths}))
+            month_counts[(station, param)] = pd.Series(result['month_counts'], index=result['months'])
+    gaps = pd.concat(gap_tables, ignore_index=True) if gap_tables else pd.DataFrame(columns=GAP_COLUMNS)
+
+    counts = pd.DataFrame(month_counts)
+    if counts.empty:
+        return gaps, counts
+    months = np.arange(counts.index.min(), counts.index.max() + 2)
+    month_hours = np.diff(months.astype('datetime64[M]').astype('datetime64[h]').astype(np.int64))
+    counts = counts.reindex(months[:-1], fill_value=0).fillna(0)
+    coverage = counts.div(month_hours, axis=0)
+    coverage.index = pd.DatetimeIndex(months[:-1].astype('datetime64[M]'), name='month')
+    coverage.columns = pd.MultiIndex.from_tuples(coverage.columns, names=['station', 'param'])
+    return gaps, coverage
+
+
+def find_windows(coverage, stations, params, min_days=90, min_coverage=0.75):
+    """Busca los periodos de meses consecutivos en que todas las series
+    pedidas tienen al menos la cobertura indicada.
+
+    Parameters
+    ----------
+    coverage : pd.DataFrame
+        Cobertura mensual entregada por 'network_completeness'.
+    stations : str or list
+        Estación o lista de estaciones.
+    params : str or list
+        Parámetro o lista de parámetros, requeridos en todas las estaciones.
+    min_days : int
+        Largo mínimo de los periodos, en días.
+    min_coverage : float
+        Fracción mínima de horas con registro en cada mes y serie.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con una fila por periodo, ordenado de mayor a menor
+        largo, con columnas 'start', 'end', 'days' y 'coverage', la menor
+        cobertura entre las series en todo el periodo.
+    """
+    stations = [stations] if isinstance(stations, str) else list(stations)
+    params = [params] if isinstance(params, str) else list(params)
+    selected = coverage[[(station, param) for station in stations for param in params]]
+    ok = (selected >= min_coverage).all(axis=1).to_numpy()
+
+    edges = np.diff(np.concatenate([[0], ok.astype(np.int8), [0]]))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    month_starts = coverage.index.append(pd.DatetimeIndex([coverage.index[-1] + pd.offsets.MonthBegin()]))
+    hours = ((month_starts[1:] - month_starts[:-1]) / pd.Timedelta(hours=1)).to_numpy()
+    weighted = selected.to_numpy() * hours[:, None]
+
+    windows = pd.DataFrame({
+        'start': month_starts[run_starts],
+        'end': month_starts[run_ends] - pd.Timedelta(hours=1),
+        'days': (month_starts[run_ends] - month_starts[run_starts]).days,
+        'coverage': [(weighted[start:end].sum(axis=0) / hours[start:end].sum()).min()
+                     for start, end in zip(run_starts, run_ends)],
+    })
+    windows = windows[windows['days'] >= min_days]
+    return windows.sort_values('days', ascending=False, kind='stable').reset_index(drop=True)
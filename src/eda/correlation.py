@@ -0,0 +1,274 @@
+import numpy as np
+import pandas as pd
+
+from src.eda.processing import value_columns
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def hourly_matrix(df, columns=None):
+    """Lleva las columnas de un DataFrame a una grilla horaria completa,
+    de modo que un desfase de k filas equivalga a k horas.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame indexado por hora. Puede tener columnas MultiIndex
+        (estación, columna) para comparar varias estaciones.
+    columns : list (optional)
+        Columnas a considerar. Por defecto todas las numéricas.
+
+    Returns
+    -------
+    tuple
+        tuple con un arreglo float64 de forma (hora, variable), con NaN en
+        las horas sin registro, y la lista de columnas.
+    """
+    columns = value_columns(df) if columns is None else list(columns)
+    df = df[columns].sort_index()
+    grid = pd.date_range(df.index[0], df.index[-1], freq=HOUR)
+    return df.reindex(grid).to_numpy(dtype=np.float64), columns
+
+
+def standardize(values):
+    """Centra y escala cada columna ignorando los NaN, y entrega los valores
+    con ceros en lugar de NaN junto a la máscara de valores válidos. La
+    correlación no cambia, pero las sumas quedan mejor condicionadas."""
+    mask = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+    return np.where(mask, values, 0.0), mask.astype(np.float64)
+
+
+def correlation_from_sums(n, s0, s1, s00, s11, s01, min_periods):
+    """Correlación de Pearson a partir de las sumas sobre los pares válidos:
+    cantidad, sumas, sumas de cuadrados y suma de productos."""
+    n = np.rint(n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = s01 - s0 * s1 / n
+        var0 = s00 - s0 ** 2 / n
+        var1 = s11 - s1 ** 2 / n
+        corr = cov / np.sqrt(var0 * var1)
+    corr = np.clip(corr, -1, 1)
+    corr[(n < min_periods) | (var0 <= 0) | (var1 <= 0)] = np.nan
+    return corr
+
+
+def cross_correlation(df, columns=None, max_lag=168, min_periods=30):
+    """Calcula con FFT la correlación cruzada normalizada entre todos los
+    pares de variables para desfases de -max_lag a max_lag horas. Cada
+    desfase usa solo los pares de horas en que ambas variables tienen
+    registro, por lo que los NaN no invalidan la serie.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame horario. Con columnas MultiIndex (estación, columna),
+        como las de 'get_multi_station_data', se comparan todas las
+        variables de todas las estaciones.
+    columns : list (optional)
+        Columnas a considerar. Por defecto todas las numéricas.
+    max_lag : int
+        Desfase máximo en horas.
+    min_periods : int
+        Cantidad mínima de pares válidos para calcular la correlación.
+
+    Returns
+    -------
+    tuple
+        tuple con un arreglo de forma (variable, variable, desfase) donde
+        el elemento [i, j, k] es la correlación entre la variable i en la
+        hora t y la variable j en la hora t + lags[k], el arreglo de
+        desfases 'lags' y la lista de columnas. Un máximo en un desfase
+        positivo indica que la variable i antecede a la variable j.
+    """
+    values, columns = hourly_matrix(df, columns)
+    x, mask = standardize(values)
+    n_fft = 1 << int(np.ceil(np.log2(x.shape[0] + max_lag)))
+    lags = np.arange(-max_lag, max_lag + 1)
+    lag_pos = lags % n_fft
+
+    # Transformadas de los valores, sus cuadrados y la máscara de cada variable.
+    spectra = {name: np.fft.rfft(array.T, n_fft, axis=1) for name, array in
+               [('x', x), ('x2', x ** 2), ('m', mask)]}
+
+    corr = np.empty((len(columns), len(columns), lags.size))
+    for i in range(len(columns)):
+        def xcorr(first, second):
+            # sum_t a_i[t] b_j[t + k] para todas las variables j a la vez.
+            product = np.conj(spectra[first][i])[None, :] * spectra[second]
+            return np.fft.irfft(product, n_fft, axis=1)[:, lag_pos]
+        corr[i] = correlation_from_sums(xcorr('m', 'm'), xcorr('x', 'm'), xcorr('m', 'x'),
+                                        xcorr('x2', 'm'), xcorr('m', 'x2'), xcorr('x', 'x'), min_periods)
+    return corr, lags, columns
+
+
+def best_lags(corr, lags, columns, absolute=True):
+    """Entrega el desfase de mayor correlación de cada par de variables.
+
+    Parameters
+    ----------
+    corr : np.array
+        Arreglo (variable, variable, desfase) de 'cross_correlation'.
+    lags : np.array
+        Desfases correspondientes al último eje de 'corr'.
+    columns : list
+        Nombres de las variables.
+    absolute : bool
+        Condición para buscar el máximo del valor absoluto, de modo de
+        considerar también las correlaciones negativas.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame indexado por el par de variables, con columnas 'lag'
+        y 'corr'.
+    """
+    score = np.abs(corr) if absolute else corr
+    # Los pares sin ninguna correlación válida quedan con NaN.
+    all_nan = np.isnan(score).all(axis=2)
+    best = np.argmax(np.where(np.isnan(score), -np.inf, score), axis=2)
+    best_corr = np.take_along_axis(corr, best[..., None], axis=2)[..., 0]
+    index = pd.MultiIndex.from_product([columns, columns], names=['var1', 'var2'])
+    return pd.DataFrame({'lag': np.where(all_nan, np.nan, lags[best]).ravel(),
+                         'corr': np.where(all_nan, np.nan, best_corr).ravel()}, index=index)
+
+
+def rank_columns(values):
+    """Reemplaza cada columna por sus rangos, manteniendo los NaN. Los
+    rangos se calculan sobre todos los registros de cada columna."""
+    return pd.DataFrame(values).rank().to_numpy(dtype=np.float64)
+
+
+def lagged_sums(stacked, lag, block_size=None):
+    """Sumas sobre los pares de horas (t, t + lag) válidos en ambas
+    variables, para todos los pares de variables con un solo producto de
+    matrices. Con 'block_size' se entregan las sumas de cada bloque de
+    horas consecutivas, asignando cada par al bloque de t.
+
+    Parameters
+    ----------
+    stacked : np.array
+        Arreglo (hora, 3V) con la máscara, los valores y sus cuadrados,
+        como el que entrega 'prepare_values'.
+    lag : int
+        Desfase en horas.
+    block_size : int (optional)
+        Largo de los bloques en horas.
+
+    Returns
+    -------
+    np.array
+        Arreglo (3V, 3V), o (bloque, 3V, 3V) con 'block_size', con los
+        productos cruzados de [máscara, valores, valores al cuadrado].
+    """
+    n_rows = stacked.shape[0] - lag
+    first, second = stacked[:n_rows], stacked[lag:lag + n_rows]
+    if block_size is None:
+        return first.T @ second
+    n_blocks = -(-n_rows // block_size)
+    pad = n_blocks * block_size - n_rows
+    first = np.pad(first, ((0, pad), (0, 0))).reshape(n_blocks, block_size, -1)
+    second = np.pad(second, ((0, pad), (0, 0))).reshape(n_blocks, block_size, -1)
+    return np.transpose(first, (0, 2, 1)) @ second
+
+
+def correlation_from_products(products, n_vars, min_periods):
+    """Correlación a partir de los productos de 'lagged_sums', en los
+    últimos dos ejes."""
+    m, x, x2 = (slice(k * n_vars, (k + 1) * n_vars) for k in range(3))
+    return correlation_from_sums(products[..., m, m], products[..., x, m], products[..., m, x],
+                                 products[..., x2, m], products[..., m, x2], products[..., x, x], min_periods)
+
+
+def prepare_values(df, columns, method):
+    if method not in ['pearson', 'spearman']:
+        raise ValueError(f"Método '{method}' no soportado, debe ser 'pearson' o 'spearman'")
+    values, columns = hourly_matrix(df, columns)
+    if method == 'spearman':
+        values = rank_columns(values)
+    x, mask = standardize(values)
+    return np.concatenate([mask, x, x ** 2], axis=1), columns
+
+
+def lagged_correlation(df, columns=None, max_lag=24, method='pearson', min_periods=30):
+    """Calcula las matrices de correlación entre todas las columnas para
+    desfases de 0 a max_lag horas, con un producto de matrices por desfase
+    y usando en cada par solo las horas con registro en ambas variables.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame horario.
+    columns : list (optional)
+        Columnas a considerar. Por defecto todas las numéricas.
+    max_lag : int
+        Desfase máximo en horas.
+    method : str
+        'pearson' o 'spearman'. En 'spearman' los rangos de cada columna
+        se calculan con todos sus registros, no solo los del par.
+    min_periods : int
+        Cantidad mínima de pares válidos para calcular la correlación.
+
+    Returns
+    -------
+    tuple
+        tuple con un arreglo de forma (desfase, variable, variable) donde
+        el elemento [k, i, j] es la correlación entre la variable i en la
+        hora t y la variable j en la hora t + k, el arreglo de desfases y
+        la lista de columnas.
+    """
+    stacked, columns = prepare_values(df, columns, method)
+    lags = np.arange(max_lag + 1)
+    products = np.stack([lagged_sums(stacked, lag) for lag in lags])
+    return correlation_from_products(products, len(columns), min_periods), lags, columns
+
+
+def correlation_intervals(df, columns=None, max_lag=24, method='pearson', n_boot=500, block_size=168, ci=0.95,
+                          min_periods=30, random_state=None):
+    """Intervalos de confianza de 'lagged_correlation' por bootstrap de
+    bloques. Las sumas de cada bloque de horas se calculan una sola vez y
+    cada réplica solo las combina según cuántas veces se sorteó cada
+    bloque, lo que conserva la autocorrelación dentro de los bloques.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame horario.
+    columns : list (optional)
+        Columnas a considerar. Por defecto todas las numéricas.
+    max_lag : int
+        Desfase máximo en horas.
+    method : str
+        'pearson' o 'spearman'.
+    n_boot : int
+        Cantidad de réplicas.
+    block_size : int
+        Largo de los bloques en horas.
+    ci : float
+        Nivel de confianza de los intervalos.
+    min_periods : int
+        Cantidad mínima de pares válidos para calcular la correlación.
+    random_state : int (optional)
+        Semilla del generador aleatorio.
+
+    Returns
+    -------
+    tuple
+        tuple con los arreglos (desfase, variable, variable) del límite
+        inferior y superior de cada correlación.
+    """
+    stacked, columns = prepare_values(df, columns, method)
+    rng = np.random.default_rng(random_state)
+    alpha = 100 * (1 - ci) / 2
+    lower, upper = [], []
+    for lag in range(max_lag + 1):
+        block_sums = lagged_sums(stacked, lag, block_size)
+        n_blocks = block_sums.shape[0]
+        counts = rng.multinomial(n_blocks, np.full(n_blocks, 1 / n_blocks), size=n_boot)
+        replicas = (counts @ block_sums.reshape(n_blocks, -1)).reshape(n_boot, *block_sums.shape[1:])
+        corr = correlation_from_products(replicas, len(columns), min_periods)
+        low, high = np.nanpercentile(corr, [alpha, 100 - alpha], axis=0)
+        lower.append(low)
+        upper.append(high)
+    return np.stack(lower), np.stack(upper)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+EPISODE_COLUMNS = ['station', 'threshold', 'start', 'end', 'duration', 'hours', 'peak', 'exposure']
+
+
+def to_hours(index):
+    """Convierte un DatetimeIndex a horas enteras desde 1970."""
+    return index.values.astype('datetime64[h]').astype(np.int64)
+
+
+def find_episodes(series, thresholds, max_gap=0):
+    """Encuentra los episodios en que una serie horaria supera cada umbral,
+    codificando por largo de rachas las horas sobre el umbral en una sola
+    pasada por umbral. Una hora igual al umbral no lo supera, igual que en
+    'get_SO2_peaks'.
+
+    Parameters
+    ----------
+    series : pd.Series
+        Serie horaria indexada por fecha. Las horas sin registro o con NaN
+        se consideran bajo el umbral.
+    thresholds : float or list
+        Umbral o lista de umbrales, en las unidades de la serie.
+    max_gap : int
+        Cantidad máxima de horas bajo el umbral que pueden separar dos
+        rachas de un mismo episodio. Con 0 solo se unen horas consecutivas.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con un episodio por fila y columnas 'threshold',
+        'start' y 'end' (primera y última hora sobre el umbral),
+        'duration' (horas entre el inicio y el fin, inclusive), 'hours'
+        (horas sobre el umbral), 'peak' (máximo del episodio) y 'exposure'
+        (suma de las concentraciones sobre el umbral, en unidades por hora).
+    """
+    series = series.dropna().sort_index()
+    stamps = to_hours(series.index)
+    values = series.to_numpy(dtype=np.float64)
+    tables = []
+    for threshold in np.atleast_1d(thresholds):
+        above = np.flatnonzero(values > threshold)
+        hours, above_values = stamps[above], values[above]
+        # Un episodio nuevo empieza donde la distancia a la hora anterior
+        # sobre el umbral supera la separación permitida.
+        breaks = np.flatnonzero(np.diff(hours) > max_gap + 1) + 1
+        starts = np.concatenate([[0], breaks]) if hours.size else np.array([], dtype=np.int64)
+        ends = np.concatenate([breaks, [hours.size]]) - 1 if hours.size else starts
+        tables.append(pd.DataFrame({
+            'threshold': np.full(starts.size, threshold),
+            'start': hours[starts].astype('datetime64[h]').astype('datetime64[ns]'),
+            'end': hours[ends].astype('datetime64[h]').astype('datetime64[ns]'),
+            'duration': hours[ends] - hours[starts] + 1,
+            'hours': ends - starts + 1,
+            'peak': np.maximum.reduceat(above_values, starts) if starts.size else np.array([]),
+            'exposure': np.add.reduceat(above_values, starts) if starts.size else np.array([]),
+        }))
+    if not tables:
+        return pd.DataFrame(columns=EPISODE_COLUMNS[1:])
+    return pd.concat(tables, ignore_index=True)
+
+
+def iter_station_series(data, column):
+    """Recorre la columna 'column' de cada estación, a partir de un dict
+    estación -> DataFrame o de un DataFrame con columnas MultiIndex
+    (estación, columna) como el que entrega 'get_multi_station_data'."""
+    if isinstance(data, pd.DataFrame):
+        for station in data.columns.get_level_values(0).unique():
+            if (station, column) in data.columns:
+                yield station, data[(station, column)]
+    else:
+        for station, station_df in data.items():
+            yield station, station_df[column]
+
+
+def station_episodes(data, column, thresholds, max_gap=0):
+    """Encuentra los episodios sobre cada umbral en varias estaciones.
+
+    Parameters
+    ----------
+    data : dict or pd.DataFrame
+        dict que asocia cada estación con su DataFrame horario, o
+        DataFrame con columnas MultiIndex (estación, columna).
+    column : str
+        Columna a analizar, por ejemplo 'SO2'.
+    thresholds : float or list
+        Umbral o lista de umbrales.
+    max_gap : int
+        Horas bajo el umbral que pueden separar rachas de un mismo episodio.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con las columnas de 'find_episodes' más la estación.
+    """
+    tables = []
+    for station, series in iter_station_series(data, column):
+        episodes = find_episodes(series, thresholds, max_gap)
+        episodes.insert(0, 'station', station)
+        tables.append(episodes)
+    if not tables:
+        return pd.DataFrame(columns=EPISODE_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def duration_stats(episodes, by=('station', 'threshold')):
+    """Resume la duración de los episodios por grupo.
+
+    Parameters
+    ----------
+    episodes : pd.DataFrame
+        Tabla entregada por 'find_episodes' o 'station_episodes'.
+    by : tuple
+        Columnas por las que agrupar.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame con la cantidad de episodios, la duración media,
+        mediana y máxima, el total de horas sobre el umbral y la exposición
+        total de cada grupo.
+    """
+    by = [col for col in by if col in episodes.columns]
+    return episodes.groupby(by).agg(episodes=('duration', 'size'), mean_duration=('duration', 'mean'),
+                                    median_duration=('duration', 'median'), max_duration=('duration', 'max'),
+                                    hours=('hours', 'sum'), exposure=('exposure', 'sum'))
+
+
+def start_hour_counts(episodes):
+    """Cuenta los episodios según su hora de inicio y su duración.
+
+    Parameters
+    ----------
+    episodes : pd.DataFrame
+        Tabla de episodios de una estación y un umbral.
+
+    Returns
+    -------
+    pd.DataFrame
+        pd.DataFrame indexado por hora de inicio (0 a 23) con una columna
+        por duración en horas.
+    """
+    counts = pd.crosstab(episodes['start'].dt.hour, episodes['duration'])
+    return counts.reindex(range(24), fill_value=0).rename_axis(index='hour', columns='duration')
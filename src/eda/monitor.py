@@ -0,0 +1,268 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+NS_PER_HOUR = 3600 * 10 ** 9
+
+
+def to_hour(time):
+    """Convierte una fecha a horas enteras desde 1970."""
+    if not isinstance(time, pd.Timestamp):
+        time = pd.Timestamp(time)
+    return time.value // NS_PER_HOUR
+
+
+def hour_to_timestamp(hour):
+    return pd.Timestamp(hour * NS_PER_HOUR)
+
+
+class ExceedanceMonitor:
+    """Monitor en línea de los límites de una estación y un parámetro sobre
+    ventanas móviles de horas, por ejemplo el valor horario, la media móvil
+    de 3 horas y la media de 24 horas.
+
+    Las últimas horas se guardan en un buffer circular del largo de la
+    ventana mayor, y para cada ventana se lleva la suma y la cantidad de
+    registros válidos, por lo que cada observación se procesa en tiempo
+    constante. La media y la varianza de todas las observaciones se
+    acumulan con el método de Welford.
+
+    Una ventana supera su límite solo si su media es estrictamente mayor,
+    igual que en 'get_SO2_peaks' y 'find_episodes'; una media igual al
+    límite no inicia una superación.
+
+    'update' procesa unas 500 mil observaciones por segundo, por lo que
+    para reprocesar la historia conviene 'replay', que supera el millón.
+
+    Parameters
+    ----------
+    limits : dict
+        dict que asocia el largo de cada ventana en horas con su límite.
+    station : str (optional)
+        Nombre de la estación, que se incluye en los eventos.
+    param : str
+        Parámetro monitoreado, que se incluye en los eventos.
+    min_valid : float
+        Fracción mínima de horas con registro para evaluar la media de una
+        ventana. Las ventanas con menos registros no inician ni terminan
+        una superación.
+    """
+
+    def __init__(self, limits, station=None, param='SO2', min_valid=0.75):
+        if not limits:
+            raise ValueError('Se debe indicar al menos un límite')
+        self.windows = sorted(int(window) for window in limits)
+        if self.windows[0] < 1:
+            raise ValueError('Las ventanas deben ser de al menos una hora')
+        self.limits = [limits[window] for window in self.windows]
+        self.min_counts = [max(1, math.ceil(min_valid * window)) for window in self.windows]
+        self.station = station
+        self.param = param
+        self.size = self.windows[-1]
+        self.reset()
+
+    def reset(self):
+        """Vacía el buffer, las sumas y las superaciones en curso."""
+        self.buffer = [math.nan] * self.size
+        self.pos = 0
+        self.last_hour = None
+        self.sums = [0.0] * len(self.windows)
+        self.counts = [0] * len(self.windows)
+        # Hora de inicio de la superación en curso de cada ventana, o None.
+        self.active = [None] * len(self.windows)
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    def window_means(self):
+        """Media actual de cada ventana, con NaN si no tiene suficientes
+        registros válidos."""
+        return {window: self.sums[i] / self.counts[i] if self.counts[i] >= self.min_counts[i] else math.nan
+                for i, window in enumerate(self.windows)}
+
+    def _push(self, value):
+        buffer, size, pos = self.buffer, self.size, self.pos
+        valid = value == value
+        for i, window in enumerate(self.windows):
+            leaving = buffer[(pos - window) % size]
+            if leaving == leaving:
+                self.counts[i] -= 1
+                self.sums[i] = self.sums[i] - leaving if self.counts[i] else 0.0
+            if valid:
+                self.sums[i] += value
+                self.counts[i] += 1
+        buffer[pos] = value
+        self.pos = (pos + 1) % size
+
+    def _event(self, i, kind, hour, value):
+        return {'station': self.station, 'param': self.param, 'window': self.windows[i],
+                'limit': self.limits[i], 'event': kind, 'time': hour_to_timestamp(hour), 'value': value}
+
+    def update(self, time, value):
+        """Procesa una nueva observación horaria.
+
+        Parameters
+        ----------
+        time : str or pd.Timestamp
+            Hora de la observación, posterior a la última procesada. Las
+            horas intermedias sin registro se consideran faltantes.
+        value : float
+            Concentración, o NaN si no hay registro.
+
+        Returns
+        -------
+        list
+            list de dict con los eventos de inicio ('start') o término
+            ('end') de superación de cada ventana en esta hora. En un
+            término se entrega la primera hora que no supera el límite.
+        """
+        hour = to_hour(time)
+        value = float(value)
+        if self.last_hour is not None:
+            missing = hour - self.last_hour - 1
+            if missing < 0:
+                raise ValueError(f'La hora {time} no es posterior a la última procesada')
+            if missing >= self.size:
+                # La brecha vacía todas las ventanas.
+                self.buffer = [math.nan] * self.size
+                self.sums = [0.0] * len(self.windows)
+                self.counts = [0] * len(self.windows)
+            else:
+                for _ in range(missing):
+                    self._push(math.nan)
+        self._push(value)
+        self.last_hour = hour
+        if value == value:
+            self.n += 1
+            delta = value - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (value - self.mean)
+
+        events = []
+        for i in range(len(self.windows)):
+            if self.counts[i] < self.min_counts[i]:
+                continue
+            mean = self.sums[i] / self.counts[i]
+            exceeded = mean > self.limits[i]
+            if exceeded and self.active[i] is None:
+                self.active[i] = hour
+                events.append(self._event(i, 'start', hour, mean))
+            elif not exceeded and self.active[i] is not None:
+                self.active[i] = None
+                events.append(self._event(i, 'end', hour, mean))
+        return events
+
+    def replay(self, series):
+        """Procesa de una vez una serie horaria, con el mismo resultado que
+        llamar a 'update' hora a hora pero calculando todas las ventanas
+        sobre arreglos.
+
+        Parameters
+        ----------
+        series : pd.Series
+            Serie horaria indexada por fecha, posterior a la última hora
+            procesada.
+
+        Returns
+        -------
+        list
+            list de dict con los eventos en orden cronológico.
+        """
+        series = series.sort_index()
+        if series.empty:
+            return []
+        hours = series.index.values.astype('datetime64[h]').astype(np.int64)
+        if self.last_hour is not None and hours[0] <= self.last_hour:
+            raise ValueError('La serie empieza antes de la última hora procesada')
+        first = hours[0] if self.last_hour is None else self.last_hour + 1
+        grid = np.full(hours[-1] - first + 1, np.nan)
+        grid[hours - first] = series.to_numpy(dtype=np.float64)
+
+        # El buffer en orden cronológico antecede a la serie nueva.
+        history = np.array(self.buffer[self.pos:] + self.buffer[:self.pos])
+        extended = np.concatenate([history, grid])
+        valid = ~np.isnan(extended)
+        filled = np.where(valid, extended, 0.0)
+        cum_counts = np.concatenate([[0], np.cumsum(valid)])
+
+        event_rows = []
+        ends = np.arange(self.size, extended.size) + 1
+        for i, window in enumerate(self.windows):
+            # Suma directa de cada ventana, sin la pérdida de precisión de
+            # restar sumas acumuladas grandes.
+            sums = np.lib.stride_tricks.sliding_window_view(filled[self.size - window + 1:], window).sum(axis=1)
+            counts = cum_counts[ends] - cum_counts[ends - window]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = sums / counts
+            evaluated = counts >= self.min_counts[i]
+            # Las ventanas sin registros suficientes mantienen el estado anterior.
+            state = np.where(evaluated, means > self.limits[i], np.nan)
+            state = pd.Series(np.concatenate([[float(self.active[i] is not None)], state])).ffill().to_numpy()
+            changes = np.flatnonzero(np.diff(state) != 0)
+            for position in changes:
+                kind = 'start' if state[position + 1] else 'end'
+                event_rows.append((position, i, kind, means[position]))
+            if state[-1]:
+                starts = changes[state[changes + 1] == 1]
+                if starts.size:
+                    self.active[i] = first + starts[-1]
+            else:
+                self.active[i] = None
+
+        # Estado final igual al de la actualización hora a hora.
+        self.buffer = extended[-self.size:].tolist()
+        self.pos = 0
+        self.last_hour = hours[-1]
+        tail_valid = valid[-self.size:]
+        for i, window in enumerate(self.windows):
+            window_values = extended[-window:][tail_valid[-window:]]
+            self.counts[i] = int(window_values.size)
+            self.sums[i] = float(window_values.sum())
+        self._merge_stats(grid[~np.isnan(grid)])
+
+        event_rows.sort(key=lambda row: (row[0], row[1]))
+        return [self._event(i, kind, first + position, float(mean)) for position, i, kind, mean in event_rows]
+
+    def _merge_stats(self, values):
+        """Combina la media y varianza acumuladas con las de un bloque de
+        valores, con la fórmula de Chan para el método de Welford."""
+        if not values.size:
+            return
+        n_b, mean_b = values.size, float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    def seed(self, data_df, column=None):
+        """Inicializa el monitor con datos históricos, como los que entrega
+        'get_minma_data', sin emitir eventos. Una superación en curso al
+        final de los datos queda activa.
+
+        Parameters
+        ----------
+        data_df : pd.DataFrame or pd.Series
+            Datos horarios indexados por fecha.
+        column : str (optional)
+            Columna a utilizar. Por defecto el parámetro del monitor.
+
+        Returns
+        -------
+        ExceedanceMonitor
+            El mismo monitor, para encadenar llamadas.
+        """
+        if isinstance(data_df, pd.DataFrame):
+            data_df = data_df[self.param if column is None else column]
+        self.replay(data_df)
+        return self
+
+
+def events_to_frame(events):
+    """Convierte una lista de eventos a DataFrame, ordenado por hora."""
+    columns = ['station', 'param', 'window', 'limit', 'event', 'time', 'value']
+    return pd.DataFrame(events, columns=columns).sort_values('time', kind='stable').reset_index(drop=True)
@@ -2,14 +2,293 @@ import numpy as np
 import pandas as pd
 import copy
 
+from src.eda.circular import circular_groupby, circular_sums, is_direction_column, stats_from_sums
+
+DAILY_STATS = ['min', 'max', 'mean', 'std']
+
+def iter_chunks(data):
+    """Entrega los bloques de datos a recorrer, ya sea un único DataFrame
+    o un iterable de DataFrames como el que entrega 'iter_minma_data'.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or iterable
+        DataFrame o iterable de DataFrames ordenados en el tiempo.
+
+    Returns
+    -------
+    iterable
+        Iterable de DataFrames.
+    """
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return [data]
+    return data
+
+def iter_days(data, columns=None):
+    """Recorre los datos día a día, sin necesidad de tenerlos completos
+    en memoria si se entrega un iterable de bloques.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or iterable
+        DataFrame o iterable de DataFrames ordenados en el tiempo, con
+        bloques que no separan un mismo día.
+    columns : list (optional)
+        Columnas a considerar. Por defecto se usan todas.
+
+    Yields
+    ------
+    pd.DataFrame
+        DataFrame con los datos de cada día no vacío.
+    """
+    for chunk in iter_chunks(data):
+        if columns is not None:
+            chunk = chunk[columns]
+        for _, day_df in chunk.groupby(pd.Grouper(freq='D')):
+            if not day_df.empty:
+                yield day_df
+
+def to_object_array(items):
+    """Guarda una lista de objetos en un arreglo de numpy de una dimensión,
+    sin que numpy intente apilar los objetos de igual largo.
+
+    Parameters
+    ----------
+    items : list
+        Lista de objetos, por ejemplo pd.Series diarias.
+
+    Returns
+    -------
+    np.array
+        Arreglo de tipo 'object' con un elemento por objeto.
+    """
+    array = np.empty(len(items), dtype=object)
+    for idx, item in enumerate(items):
+        array[idx] = item
+    return array
+
+def value_columns(df):
+    """Entrega las columnas numéricas de un DataFrame, omitiendo las
+    columnas de estado que agrega el formato 'coalesced' de los datos.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame con datos de uno o más parámetros.
+
+    Returns
+    -------
+    list
+        Lista con los nombres de las columnas numéricas.
+    """
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype)]
+
+def iter_whole_days(data, column):
+    """Recorre una columna por bloques que contienen solo días completos.
+    Si un día queda repartido entre dos bloques, su primera parte se guarda
+    y se entrega junto al bloque siguiente, por lo que en memoria solo hay
+    un bloque y a lo más un día a la vez.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or iterable
+        DataFrame o iterable de DataFrames ordenados en el tiempo.
+    column : string
+        Columna a recorrer.
+
+    Yields
+    ------
+    pd.Series
+        Series de cada bloque, sin días repartidos con otros bloques.
+    """
+    carry = None
+    for chunk in iter_chunks(data):
+        series = chunk[column]
+        if carry is not None:
+            series = pd.concat([carry, series])
+        if series.empty:
+            continue
+        # El último día puede continuar en el bloque siguiente.
+        last_day = series.index[-1].normalize()
+        split = series.index.searchsorted(last_day)
+        carry = series.iloc[split:]
+        if split:
+            yield series.iloc[:split]
+    if carry is not None and not carry.empty:
+        yield carry
+
+def classify_series(SO2, levels):
+    """Clasifica los días de una Series de SO2 para los niveles dados.
+
+    Returns
+    -------
+    tuple
+        tuple con un DatetimeIndex de los días con registros, el arreglo
+        (día, hora) de concentraciones y un arreglo booleano (día, nivel)
+        de días de peak.
+    """
+    stamps = SO2.index.values.astype('datetime64[h]').astype(np.int64)
+    day_ids = stamps // 24
+    days, day_pos = np.unique(day_ids, return_inverse=True)
+    hourly = np.full((days.shape[0], 24), np.nan)
+    hourly[day_pos, stamps % 24] = SO2.to_numpy(dtype=np.float64)
+    # Las comparaciones con NaN son falsas, como en '(g > peak_level).any()'.
+    daily_max = np.fmax.reduce(hourly, axis=1)
+    return pd.DatetimeIndex(days.astype('datetime64[D]')), hourly, daily_max[:, None] > levels[None, :]
+
+def classify_days(df, SO2_col, peak_levels):
+    """Clasifica cada día según si su concentración de SO2 supera alguno de
+    los niveles de 'peak_levels', calculando el máximo diario una sola vez
+    para todos los niveles. Los bloques se clasifican uno a uno, sin unir
+    la serie completa.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or iterable
+        DataFrame con una columna de SO2, o iterable de bloques de datos.
+    SO2_col : string
+        Columna respectiva del SO2 dentro del DataFrame.
+    peak_levels : int or list
+        Nivel o lista de niveles desde los cuales se considera un peak.
+
+    Returns
+    -------
+    tuple
+        tuple con un DatetimeIndex de los días con registros, un arreglo
+        de forma (día, hora) con las concentraciones, con NaN en las horas
+        sin registro, y un DataFrame booleano indexado por día con una
+        columna por nivel que indica los días de peak. Los días normales
+        son su negación.
+    """
+    levels = np.atleast_1d(peak_levels)
+    days, hourly, peaks = [], [], []
+    for SO2 in iter_whole_days(df, SO2_col):
+        chunk_days, chunk_hourly, chunk_peaks = classify_series(SO2, levels)
+        days.append(chunk_days)
+        hourly.append(chunk_hourly)
+        peaks.append(chunk_peaks)
+    if not days:
+        return pd.DatetimeIndex([]), np.empty((0, 24)), pd.DataFrame(np.empty((0, levels.size), dtype=bool),
+                                                                     index=pd.DatetimeIndex([]), columns=levels)
+    peaks = pd.DataFrame(np.concatenate(peaks), index=days[0].append(days[1:]), columns=levels)
+    return peaks.index, np.concatenate(hourly), peaks
+
+def slice_days(SO2, days):
+    """Separa una Series en una Series por cada día de 'days' con
+    'searchsorted', sin recorrer el resto de los días."""
+    bounds = SO2.index.searchsorted(days)
+    ends = SO2.index.searchsorted(days + pd.Timedelta(days=1))
+    return [SO2.iloc[first:last] for first, last in zip(bounds, ends)]
+
+def split_days(df, SO2_col, days):
+    """Separa una columna en una Series por cada día de 'days', sin recorrer
+    el resto de los días ni unir los bloques de datos.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or iterable
+        DataFrame con la columna a separar, o iterable de bloques de datos.
+    SO2_col : string
+        Columna a separar.
+    days : pd.DatetimeIndex
+        Días a extraer.
+
+    Returns
+    -------
+    np.array
+        Arreglo de tipo 'object' con una Series por día.
+    """
+    days = pd.DatetimeIndex(days)
+    selected = []
+    for SO2 in iter_whole_days(df, SO2_col):
+        chunk_days = days[(days >= SO2.index[0].normalize()) & (days <= SO2.index[-1])]
+        selected += slice_days(SO2, chunk_days)
+    return to_object_array(selected)
+
+def select_days(df, SO2_col, peak_level, peak):
+    """Recorre los bloques una sola vez, clasificando sus días y guardando
+    solo los días de peak (o los normales si 'peak' es falso)."""
+    levels = np.atleast_1d(peak_level)
+    selected, dates = [], []
+    for SO2 in iter_whole_days(df, SO2_col):
+        days, _, peaks = classify_series(SO2, levels)
+        chunk_days = days[peaks[:, 0] == peak]
+        selected += slice_days(SO2, chunk_days)
+        dates += [day.date() for day in chunk_days]
+    return to_object_array(selected), dates
+
+def daily_tensor(df, columns=None, dates=None, dtype=np.float32, copy=True):
+    """Ordena los datos horarios en un arreglo contiguo de forma (día, hora,
+    variable), en una sola pasada y sin separar el DataFrame por día. Sirve
+    como entrada de 'daily_stats', 'bench_k_means' y los gráficos de
+    'src.visualization.clustering'.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame con datos horarios indexados por fecha.
+    columns : list (optional)
+        Variables a incluir. Por defecto todas las columnas numéricas.
+    dates : list (optional)
+        Días a incluir, por ejemplo los que entrega 'get_SO2_peaks'. Por
+        defecto todos los días con registros.
+    dtype : np.dtype
+        Tipo de datos del arreglo.
+    copy : bool
+        Si es falso, se entrega una vista de los datos del DataFrame sin
+        copiarlos. Requiere días completos y consecutivos, desde medianoche,
+        con columnas del tipo 'dtype'.
+
+    Returns
+    -------
+    tuple
+        tuple con el arreglo de forma (día, hora, variable), con NaN en las
+        horas sin registro, un DatetimeIndex con los días y la lista de
+        variables.
+    """
+    columns = value_columns(df) if columns is None else list(columns)
+    stamps = df.index.values.astype('datetime64[h]').astype(np.int64)
+    if not copy:
+        # Solo se puede evitar la copia si las columnas forman un único bloque.
+        # Con varios bloques 'to_numpy' entrega silenciosamente un arreglo
+        # nuevo, por lo que se comprueba que comparta memoria con el DataFrame.
+        source = None
+        if columns == list(df.columns):
+            source = df.to_numpy(copy=False)
+        elif len(columns) == 1:
+            source = df[columns[0]].to_numpy(copy=False)[:, None]
+        if source is not None and columns and not np.shares_memory(source, df[columns[0]].to_numpy(copy=False)):
+            source = None
+        regular = (stamps.shape[0] % 24 == 0 and (stamps.shape[0] == 0 or stamps[0] % 24 == 0)
+                   and (np.diff(stamps) == 1).all())
+        if source is None or source.dtype != dtype or not regular or dates is not None:
+            raise ValueError('No es posible entregar una vista: se requieren días completos y consecutivos, '
+                             f"columnas {np.dtype(dtype)} en un único bloque y no seleccionar 'dates'")
+        tensor = source.reshape(-1, 24, len(columns))
+        days = pd.DatetimeIndex(stamps[::24].astype('datetime64[h]').astype('datetime64[D]'))
+        return tensor, days, columns
+
+    day_ids, hours = np.divmod(stamps, 24)
+    if dates is None:
+        days = np.unique(day_ids)
+    else:
+        days = np.unique(pd.DatetimeIndex(pd.to_datetime(list(dates))).values.astype('datetime64[D]').astype(np.int64))
+    positions = np.minimum(np.searchsorted(days, day_ids), max(days.shape[0] - 1, 0))
+    found = days[positions] == day_ids if days.shape[0] else np.zeros(day_ids.shape[0], dtype=bool)
+    tensor = np.full((days.shape[0], 24, len(columns)), np.nan, dtype=dtype)
+    tensor[positions[found], hours[found]] = df[columns].to_numpy(dtype=dtype)[found]
+    return tensor, pd.DatetimeIndex(days.astype('datetime64[D]')), columns
+
 def get_SO2_peaks(df, SO2_col, peak_level):
     """Encuentra los días de peaks de SO2 determinados por un 'peak_level'
-    y devuelve los datos filtrados junto con sus días.
+    y devuelve los datos filtrados junto con sus días. Para clasificar
+    varios niveles a la vez, ver 'classify_days'.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        DataFrame con una columna de SO2 y datos a filtrar.
+    df : pd.DataFrame or iterable
+        DataFrame con una columna de SO2 y datos a filtrar, o iterable
+        de bloques de datos.
     SO2_col : string
         Columna respectiva del SO2 dentro del DataFrame.
     peak_level : int
@@ -22,10 +301,7 @@ def get_SO2_peaks(df, SO2_col, peak_level):
         tuple con un DataFrame de datos filtrados y con una lista de los
         días filtrados.            
     """    
-    SO2_daily = np.array([g for n, g in df[SO2_col].groupby(pd.Grouper(freq='D')) if not g.empty], dtype=object)
-    peak_mask = [(day_df > peak_level).any() for day_df in SO2_daily]
-    peak_days = [day.index[0].date() for day in SO2_daily[peak_mask]]
-    return SO2_daily[peak_mask], peak_days
+    return select_days(df, SO2_col, peak_level, peak=True)
 
 def get_SO2_limit(df, SO2_col, peak_level):
     """Encuentra los días con concentraciones menores a 'peak_level'
@@ -33,8 +309,9 @@ def get_SO2_limit(df, SO2_col, peak_level):
 
     Parameters
     ----------
-    df : pd.DataFrame
-        DataFrame con una columna de SO2 y datos a filtrar.
+    df : pd.DataFrame or iterable
+        DataFrame con una columna de SO2 y datos a filtrar, o iterable
+        de bloques de datos.
     SO2_col : string
         Columna respectiva del SO2 dentro del DataFrame.
     peak_level : int
@@ -47,10 +324,7 @@ def get_SO2_limit(df, SO2_col, peak_level):
         tuple con un DataFrame de datos filtrados y con una lista de los
         días filtrados.            
     """        
-    SO2_daily = np.array([g for n, g in df[SO2_col].groupby(pd.Grouper(freq='D')) if not g.empty], dtype=object)
-    peak_mask = [(day_df > peak_level).any() == False for day_df in SO2_daily]
-    peak_days = [day.index[0].date() for day in SO2_daily[peak_mask]]
-    return SO2_daily[peak_mask], peak_days
+    return select_days(df, SO2_col, peak_level, peak=False)
 
 def filter_by_dates(df, date_list, output_format='list'):
     """Filtra los valores de un DataFrame de acuerdo a los días a considerar
@@ -131,44 +405,222 @@ def df_counts(data):
 
     Parameters
     ----------
-    data : pd.DataFrame
+    data : pd.DataFrame or iterable
         DataFrame al cual se le extraerá la información de la estrucutra
-        de sus datos.
+        de sus datos, o iterable de bloques de datos ordenados.
 
     Returns
     -------
     pd.DataFrame
         DataFrame que muestra el resumen de los conteos respectivos.
     """   
-    df = pd.concat([data.count(), data.isna().sum()], axis=1)
-    expected_dates = pd.date_range(data.index[0], data.index[-1], freq='H').shape[0]
+    counts, nulls, first, last, dtypes = 0, 0, None, None, None
+    for chunk in iter_chunks(data):
+        if chunk.empty:
+            continue
+        counts = counts + chunk.count()
+        nulls = nulls + chunk.isna().sum()
+        first = chunk.index[0] if first is None else first
+        last = chunk.index[-1]
+        dtypes = chunk.dtypes
+    df = pd.concat([counts, nulls], axis=1)
+    expected_dates = (last - first) // pd.Timedelta(hours=1) + 1
     df.columns = ['N° datos', 'N° datos nulos']
     df['N° datos esperados'] = expected_dates
     df['Datos respecto al esperado [%]'] = (100 * df['N° datos'] / df['N° datos esperados']).round(2)
-    df['Tipo de datos'] = data.dtypes
+    df['Tipo de datos'] = dtypes
     return df
 
+def pad_days(df_list_daily):
+    """Apila una lista de días en un arreglo (día, fila, variable), con NaN
+    al final de los días con menos filas.
+
+    Parameters
+    ----------
+    df_list_daily : list
+        list de DataFrames o Series, uno por día.
+
+    Returns
+    -------
+    np.array
+        Arreglo de float64 de forma (día, fila, variable).
+    """
+    if not df_list_daily:
+        return np.empty((0, 0, 0))
+    lengths = np.array([df.shape[0] for df in df_list_daily])
+    # Una sola concatenación es mucho más rápida que convertir cada día.
+    data = pd.concat(df_list_daily, ignore_index=True)
+    if isinstance(data, pd.DataFrame):
+        data = data[value_columns(data)]
+    values = data.to_numpy(dtype=np.float64).reshape(lengths.sum(), -1)
+    padded = np.full((len(df_list_daily), lengths.max(), values.shape[1]), np.nan)
+    rows = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    padded[np.repeat(np.arange(len(df_list_daily)), lengths), rows] = values
+    return padded
+
+def nan_quantiles(values, quantiles):
+    """Calcula cuantiles sobre el eje 1 ignorando los NaN, con la misma
+    interpolación lineal de 'describe', ordenando el arreglo una sola vez.
+
+    Parameters
+    ----------
+    values : np.array
+        Arreglo (día, hora, variable).
+    quantiles : list
+        Cuantiles entre 0 y 1.
+
+    Returns
+    -------
+    np.array
+        Arreglo (día, cuantil, variable), con NaN en los días sin datos.
+    """
+    ordered = np.sort(values, axis=1)
+    count = (~np.isnan(values)).sum(axis=1)
+    results = []
+    for quantile in quantiles:
+        position = np.maximum(count - 1, 0) * quantile
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+        low_values = np.take_along_axis(ordered, lower[:, None], axis=1)[:, 0]
+        high_values = np.take_along_axis(ordered, upper[:, None], axis=1)[:, 0]
+        result = low_values + (high_values - low_values) * (position - lower)
+        results.append(np.where(count > 0, result, np.nan))
+    return np.stack(results, axis=1)
+
+def parse_quantile(stat):
+    if isinstance(stat, float):
+        return stat
+    if stat == 'median':
+        return 0.5
+    if isinstance(stat, str) and stat.endswith('%'):
+        return float(stat[:-1]) / 100
+    return None
+
+def day_columns(df_list_daily):
+    """Nombres de las variables de una lista de días, como las apila
+    'pad_days'."""
+    if not df_list_daily:
+        return []
+    first = df_list_daily[0]
+    if isinstance(first, pd.Series):
+        return [first.name]
+    return value_columns(first)
+
+def aggregate_days(data, stats=DAILY_STATS, circular=None):
+    """Calcula estadísticos diarios para todos los días y variables a la
+    vez, sobre un arreglo (día, hora, variable) y sin recorrer los días.
+
+    Parameters
+    ----------
+    data : pd.DataFrame, list or np.array
+        DataFrame con datos horarios indexados por fecha, list o iterable
+        de DataFrames o Series diarios, o arreglo (día, hora, variable)
+        como el que entrega 'daily_tensor'.
+    stats : list
+        Estadísticos a calcular, en orden: 'min', 'max', 'mean', 'std',
+        'count' (horas con datos), 'median', cuantiles como '25%' o 0.25,
+        y 'circmean', el promedio circular en grados para columnas de
+        dirección.
+    circular : list (optional)
+        list de bool que indica las variables de dirección en grados, en
+        las que 'mean' y 'std' son el promedio y la desviación circulares.
+        Por defecto se detectan por el nombre de las columnas si 'data' es
+        un DataFrame o una lista de días; en un arreglo no hay variables
+        circulares salvo que se indiquen.
+
+    Returns
+    -------
+    np.array
+        Arreglo de forma (día, estadístico, variable).
+    """
+    if isinstance(data, pd.DataFrame):
+        values, _, columns = daily_tensor(data, dtype=np.float64)
+    elif isinstance(data, np.ndarray) and data.ndim == 3:
+        values, columns = data.astype(np.float64, copy=False), None
+    else:
+        data = list(data)
+        values, columns = pad_days(data), day_columns(data)
+    if circular is None:
+        circular = [False] * values.shape[2] if columns is None else [is_direction_column(col) for col in columns]
+    circular = np.asarray(circular, dtype=bool)
+
+    if values.size == 0:
+        return np.full((values.shape[0], len(stats), values.shape[2]), np.nan)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total = np.where(valid, values, 0).sum(axis=1)
+        mean = np.where(count > 0, total / count, np.nan)
+        squares = np.where(valid, (values - mean[:, None]) ** 2, 0).sum(axis=1)
+        std = np.where(count > 1, np.sqrt(squares / (count - 1)), np.nan)
+
+    if circular.any() or 'circmean' in stats:
+        circular_parts = circular_sums(values, axis=1)
+    if circular.any():
+        # Las direcciones se promedian como ángulos y no como números.
+        mean = np.where(circular, stats_from_sums(*circular_parts, 'mean'), mean)
+        std = np.where(circular, stats_from_sums(*circular_parts, 'std'), std)
+
+    results = []
+    quantiles = [parse_quantile(stat) for stat in stats if parse_quantile(stat) is not None]
+    quantile_values = iter(np.moveaxis(nan_quantiles(values, quantiles), 1, 0)) if quantiles else None
+    for stat in stats:
+        if stat == 'min':
+            results.append(np.where(count > 0, np.where(valid, values, np.inf).min(axis=1), np.nan))
+        elif stat == 'max':
+            results.append(np.where(count > 0, np.where(valid, values, -np.inf).max(axis=1), np.nan))
+        elif stat == 'mean':
+            results.append(mean)
+        elif stat == 'std':
+            results.append(std)
+        elif stat == 'count':
+            results.append(count.astype(np.float64))
+        elif stat == 'circmean':
+            results.append(stats_from_sums(*circular_parts, 'mean'))
+        elif parse_quantile(stat) is not None:
+            results.append(next(quantile_values))
+        else:
+            raise ValueError(f"Estadístico desconocido: '{stat}'")
+    return np.stack(results, axis=1)
+
 def daily_stats(df_list_daily):
     """Recibe una lista de DataFrames y devuelve otro DataFrame con distintas
     estadísticas por día.
 
     Parameters
     ----------
-    df_list_daily : list
-        list de DataFrame para calcular estadísticos diarios.
+    df_list_daily : list, pd.DataFrame or np.array
+        list de DataFrame para calcular estadísticos diarios. También
+        acepta un iterable como el que entrega 'iter_days', un DataFrame
+        horario completo, o un arreglo (día, hora, variable) como el que
+        entrega 'daily_tensor'. Las columnas de estado del formato
+        'coalesced' se omiten.
 
     Returns
     -------
     np.array
-        Arreglo de numpy en forma de matriz con los estadísticos diarios
-        calculados.
+        Arreglo de numpy en forma de matriz (día, estadístico, variable)
+        con el mínimo, máximo, promedio y desviación estándar diarios. En
+        las columnas de dirección el promedio y la desviación son
+        circulares. Con una lista de Series se omite el eje de variables.
     """       
-    return np.array([df.describe().loc[['min', 'max', 'mean', 'std']].values for df in df_list_daily])
+    if isinstance(df_list_daily, pd.DataFrame) or (isinstance(df_list_daily, np.ndarray) and df_list_daily.ndim == 3):
+        return aggregate_days(df_list_daily, DAILY_STATS)
+    df_list_daily = list(df_list_daily)
+    stats = aggregate_days(df_list_daily, DAILY_STATS)
+    if df_list_daily and isinstance(df_list_daily[0], pd.Series):
+        return stats[:, :, 0]
+    return stats
 
 def time_describe(data_df, col, res, from_date, to_date, highlights=False):
     df = data_df.copy()
     df[res] = df.index.strftime(f'%{res[0]}')
-    stats_df = df[from_date:to_date][[res,col]].groupby(res).describe()
+    df = df[from_date:to_date]
+    stats_df = df[[res,col]].groupby(res).describe()
+    if is_direction_column(col):
+        circular_df = circular_groupby(df[col], df[res], ['mean', 'std'])
+        stats_df[(col, 'mean')] = circular_df['mean']
+        stats_df[(col, 'std')] = circular_df['std']
     if highlights:
         display(
             stats_df.style\
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from src.eda.circular import circmean, is_direction_column
+from src.eda.processing import daily_tensor
+
+# Perfiles calculados por columna, para no repetir el cálculo entre los
+# gráficos de una misma serie.
+PROFILE_CACHE = {}
+PROFILE_CACHE_SIZE = 16
+
+
+def nan_mean(matrix, axis):
+    """Promedio ignorando los NaN, con NaN donde no hay valores y sin
+    advertencias."""
+    valid = ~np.isnan(matrix)
+    count = valid.sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, np.where(valid, matrix, 0).sum(axis=axis) / count, np.nan)
+
+
+def day_hour_matrix(series):
+    """Ordena una serie horaria en una matriz (día, hora).
+
+    Parameters
+    ----------
+    series : pd.Series
+        Serie horaria indexada por fecha.
+
+    Returns
+    -------
+    tuple
+        tuple con la matriz (día, 24), con NaN en las horas sin registro,
+        y un DatetimeIndex con los días.
+    """
+    tensor, days, _ = daily_tensor(series.to_frame(), dtype=np.float64)
+    return tensor[:, :, 0], days
+
+
+def week_hour_matrix(day_matrix, days):
+    """Ordena una matriz (día, hora) en una matriz (semana, hora de la
+    semana), con semanas de lunes a domingo.
+
+    Parameters
+    ----------
+    day_matrix : np.array
+        Matriz (día, 24) de 'day_hour_matrix'.
+    days : pd.DatetimeIndex
+        Días de cada fila.
+
+    Returns
+    -------
+    tuple
+        tuple con la matriz (semana, 168), con NaN en las horas sin
+        registro, y un DatetimeIndex con el lunes de cada semana.
+    """
+    day_numbers = days.values.astype('datetime64[D]').astype(np.int64)
+    # El 1 de enero de 1970 fue jueves, por lo que se desplaza en 3 días.
+    week_numbers = (day_numbers + 3) // 7
+    weeks, week_pos = np.unique(week_numbers, return_inverse=True)
+    matrix = np.full((weeks.size, 7, 24), np.nan)
+    matrix[week_pos, (day_numbers + 3) % 7] = day_matrix
+    mondays = pd.DatetimeIndex((weeks * 7 - 3).astype('datetime64[D]'))
+    return matrix.reshape(weeks.size, 7 * 24), mondays
+
+
+def year_day_matrix(day_matrix, days, circular=False):
+    """Calcula el promedio diario y lo ordena en una matriz (año, día del
+    año). El 29 de febrero ocupa la posición 59 y en los años no bisiestos
+    queda vacía, de modo que cada columna sea la misma fecha todos los
+    años.
+
+    Parameters
+    ----------
+    day_matrix : np.array
+        Matriz (día, 24) de 'day_hour_matrix'.
+    days : pd.DatetimeIndex
+        Días de cada fila.
+    circular : bool
+        Condición para usar el promedio circular, para direcciones.
+
+    Returns
+    -------
+    tuple
+        tuple con la matriz (año, 366), con NaN en los días sin registro,
+        y un arreglo con los años.
+    """
+    if circular:
+        daily = circmean(day_matrix, axis=1)
+    else:
+        daily = nan_mean(day_matrix, axis=1)
+    day_of_year = days.dayofyear.to_numpy() - 1
+    # En los años no bisiestos los días desde marzo se corren en uno.
+    day_of_year = np.where(~days.is_leap_year & (day_of_year >= 59), day_of_year + 1, day_of_year)
+    years, year_pos = np.unique(days.year.to_numpy(), return_inverse=True)
+    matrix = np.full((years.size, 366), np.nan)
+    matrix[year_pos, day_of_year] = daily
+    return matrix, years
+
+
+def series_key(series):
+    return (series.name, series.shape[0], int(pd.util.hash_pandas_object(series).sum()))
+
+
+def calendar_profiles(series, circular=None):
+    """Construye las matrices de perfiles de calendario de una serie
+    horaria: (día, hora), (semana, hora de la semana) y (año, día del
+    año). El resultado se guarda en memoria por columna y se reutiliza
+    mientras la serie no cambie.
+
+    Parameters
+    ----------
+    series : pd.Series
+        Serie horaria indexada por fecha.
+    circular : bool (optional)
+        Condición para tratar la serie como direcciones en grados. Por
+        defecto se detecta por el nombre de la serie.
+
+    Returns
+    -------
+    dict
+        dict con las tuplas 'day', 'week' y 'year' entregadas por
+        'day_hour_matrix', 'week_hour_matrix' y 'year_day_matrix'.
+    """
+    if circular is None:
+        circular = is_direction_column(series.name)
+    key = (series_key(series), bool(circular))
+    if key not in PROFILE_CACHE:
+        day_matrix, days = day_hour_matrix(series)
+        if len(PROFILE_CACHE) >= PROFILE_CACHE_SIZE:
+            PROFILE_CACHE.pop(next(iter(PROFILE_CACHE)))
+        PROFILE_CACHE[key] = {'day': (day_matrix, days),
+                              'week': week_hour_matrix(day_matrix, days),
+                              'year': year_day_matrix(day_matrix, days, circular)}
+    return PROFILE_CACHE[key]
+
+
+def profile_mean(matrix, circular=False):
+    """Promedio de cada columna de una matriz de perfiles, ignorando los
+    NaN, y circular para direcciones."""
+    if circular:
+        return circmean(matrix, axis=0)
+    return nan_mean(matrix, axis=0)
@@ -0,0 +1,319 @@
+import numpy as np
+import pandas as pd
+
+
+def interpolate_sorted(sorted_values, starts, counts, quantiles):
+    """Cuantiles con interpolación lineal, como 'np.quantile', de varios
+    grupos guardados uno tras otro en un arreglo ordenado por grupo.
+
+    Parameters
+    ----------
+    sorted_values : np.array
+        Valores de todos los grupos, ordenados dentro de cada grupo.
+    starts : np.array
+        Posición del primer valor de cada grupo.
+    counts : np.array
+        Cantidad de valores de cada grupo.
+    quantiles : np.array
+        Cuantiles entre 0 y 1.
+
+    Returns
+    -------
+    np.array
+        Arreglo (grupo, cuantil), con NaN en los grupos vacíos.
+    """
+    position = np.maximum(counts - 1, 0)[:, None] * quantiles[None, :]
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0)[:, None])
+    if not sorted_values.size:
+        return np.full(position.shape, np.nan)
+    low_values = sorted_values[np.minimum(starts[:, None] + lower, sorted_values.size - 1)]
+    high_values = sorted_values[np.minimum(starts[:, None] + upper, sorted_values.size - 1)]
+    result = low_values + (high_values - low_values) * (position - lower)
+    return np.where(counts[:, None] > 0, result, np.nan)
+
+
+class QuantileIndex:
+    """Índice de distribuciones empíricas por grupo y columna, por ejemplo
+    (hora, columna) o (estadístico, columna). Todos los grupos se ordenan
+    a la vez en un único arreglo, y luego las consultas de ECDF y
+    cuantiles solo leen tramos del arreglo ordenado.
+
+    Parameters
+    ----------
+    values : np.array
+        Valores de todos los grupos en un arreglo de una dimensión.
+    codes : np.array
+        Código entero del grupo de cada valor, entre 0 y len(keys) - 1.
+    keys : list
+        list con la llave (grupo, columna) de cada código.
+    """
+
+    def __init__(self, values, codes, keys):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        codes = np.asarray(codes, dtype=np.int64).ravel()
+        valid = ~np.isnan(values)
+        values, codes = values[valid], codes[valid]
+        # Un solo 'argsort' por código deja cada grupo contiguo, y luego cada
+        # tramo se ordena en su lugar. Con códigos de 16 bits numpy usa radix
+        # sort, y los tramos pequeños se ordenan mejor que un arreglo único.
+        if len(keys) <= np.iinfo(np.uint16).max:
+            codes = codes.astype(np.uint16)
+        self.values = values[np.argsort(codes, kind='stable')]
+        self.counts = np.bincount(codes, minlength=len(keys))
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]]).astype(np.int64)
+        for start, count in zip(self.starts, self.counts):
+            self.values[start:start + count].sort()
+        self.keys = list(keys)
+        self.positions = {key: code for code, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_frame(cls, df, by, columns=None, groups=None):
+        """Construye el índice de las columnas de un DataFrame agrupadas
+        según 'by'.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame con los datos.
+        by : str or array-like
+            Columna de 'df' o arreglo con el grupo de cada fila, por
+            ejemplo 'df.index.hour'.
+        columns : list (optional)
+            Columnas a incluir. Por defecto todas las numéricas.
+        groups : list (optional)
+            Grupos del índice, por ejemplo range(24) para que todas las
+            horas existan aunque no tengan datos. Por defecto los valores
+            distintos de 'by', ordenados.
+
+        Returns
+        -------
+        QuantileIndex
+            Índice con llaves (grupo, columna).
+        """
+        labels = df[by] if isinstance(by, str) else by
+        if columns is None:
+            columns = [col for col, dtype in df.dtypes.items()
+                       if pd.api.types.is_numeric_dtype(dtype) and not (isinstance(by, str) and col == by)]
+        if groups is None:
+            group_codes, groups = pd.factorize(np.asarray(labels), sort=True)
+        else:
+            groups = list(groups)
+            group_codes = pd.Categorical(np.asarray(labels), categories=groups).codes.astype(np.int64)
+        values = df[columns].to_numpy(dtype=np.float64)
+        # Las filas sin grupo quedan fuera del índice.
+        values = np.where(group_codes[:, None] >= 0, values, np.nan)
+        codes = np.maximum(group_codes, 0)[:, None] * len(columns) + np.arange(len(columns))[None, :]
+        keys = [(group, col) for group in groups for col in columns]
+        return cls(values, codes, keys)
+
+    @classmethod
+    def from_stats(cls, stats_daily, stats, columns):
+        """Construye el índice de un arreglo (día, estadístico, variable)
+        como el que entrega 'daily_stats'.
+
+        Parameters
+        ----------
+        stats_daily : np.array
+            Arreglo (día, estadístico, variable).
+        stats : list
+            Nombres de los estadísticos.
+        columns : list
+            Nombres de las variables.
+
+        Returns
+        -------
+        QuantileIndex
+            Índice con llaves (estadístico, variable).
+        """
+        stats_daily = np.asarray(stats_daily, dtype=np.float64)
+        n_stats, n_vars = stats_daily.shape[1:]
+        codes = np.broadcast_to(np.arange(n_stats * n_vars).reshape(1, n_stats, n_vars), stats_daily.shape)
+        return cls(stats_daily, codes, [(stat, col) for stat in stats for col in columns])
+
+    def _slice(self, group, column):
+        code = self.positions[(group, column)]
+        return self.values[self.starts[code]:self.starts[code] + self.counts[code]]
+
+    def count(self, group, column):
+        return int(self.counts[self.positions[(group, column)]])
+
+    def ecdf(self, group, column):
+        """Puntos de la función de distribución acumulada empírica.
+
+        Returns
+        -------
+        tuple
+            tuple con los valores ordenados y la proporción acumulada en
+            cada uno, para dibujar como escalones.
+        """
+        values = self._slice(group, column)
+        return values, np.arange(1, values.size + 1) / values.size
+
+    def cdf(self, x, group, column):
+        """Proporción de valores menores o iguales a 'x'."""
+        values = self._slice(group, column)
+        if not values.size:
+            return np.full(np.shape(x), np.nan)
+        return np.searchsorted(values, x, side='right') / values.size
+
+    def quantile(self, q, group, column):
+        """Cuantiles de un grupo, con interpolación lineal."""
+        code = self.positions[(group, column)]
+        quantiles = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        result = interpolate_sorted(self.values, self.starts[[code]], self.counts[[code]], quantiles)[0]
+        return result if np.ndim(q) else result[0]
+
+    def quantiles(self, q):
+        """Cuantiles de todos los grupos a la vez.
+
+        Returns
+        -------
+        pd.DataFrame
+            pd.DataFrame indexado por las llaves (grupo, columna), con una
+            columna por cuantil.
+        """
+        quantiles = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        result = interpolate_sorted(self.values, self.starts, self.counts, quantiles)
+        return pd.DataFrame(result, index=pd.MultiIndex.from_tuples(self.keys), columns=quantiles)
+
+
+class QuantileSketch:
+    """Resumen aproximado de una distribución, de tamaño acotado y que se
+    puede combinar con otros, al estilo de KLL. Los valores se guardan en
+    niveles; cuando un nivel supera 'k' valores se ordena y se conserva uno
+    de cada dos, que pasa al nivel siguiente con el doble de peso.
+
+    Parameters
+    ----------
+    k : int
+        Capacidad de cada nivel. El error de rango es del orden de
+        log2(n / k) / k.
+    seed : int or np.random.SeedSequence (optional)
+        Semilla para elegir qué mitad se conserva en cada compactación.
+    """
+
+    def __init__(self, k=256, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Agrega un bloque de valores, ignorando los NaN."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.n += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Combina otro resumen en este, nivel a nivel."""
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if self.levels[level].size > self.k:
+                values = np.sort(self.levels[level])
+                if values.size % 2:
+                    # Con una cantidad impar, el último valor se queda en el nivel.
+                    values, self.levels[level] = values[:-1], values[-1:]
+                else:
+                    self.levels[level] = np.empty(0)
+                kept = values[self.rng.integers(2)::2]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], kept])
+            level += 1
+
+    def weighted_values(self):
+        """Valores guardados ordenados, con su peso acumulado normalizado."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level_values.size, 2.0 ** level)
+                                  for level, level_values in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order]) / weights.sum()
+
+    def ecdf(self):
+        """Puntos aproximados de la distribución acumulada, para dibujar
+        como escalones."""
+        if not self.n:
+            return np.empty(0), np.empty(0)
+        return self.weighted_values()
+
+    def cdf(self, x):
+        """Proporción aproximada de valores menores o iguales a 'x'."""
+        if not self.n:
+            return np.full(np.shape(x), np.nan)
+        values, cumulative = self.weighted_values()
+        position = np.searchsorted(values, x, side='right')
+        return np.where(position > 0, cumulative[np.maximum(position - 1, 0)], 0.0)
+
+    def quantile(self, q):
+        """Cuantiles aproximados."""
+        if not self.n:
+            return np.full(np.shape(q), np.nan)
+        values, cumulative = self.weighted_values()
+        position = np.searchsorted(cumulative, q, side='left')
+        return values[np.minimum(position, values.size - 1)]
+
+
+class SketchIndex:
+    """Colección de 'QuantileSketch' con llaves (grupo, columna), que se
+    actualiza por bloques y se combina con otras, para comparar
+    distribuciones de varias estaciones o años sin tener todos los datos
+    en memoria. Las consultas tienen la misma forma que en 'QuantileIndex'.
+
+    Parameters
+    ----------
+    k : int
+        Capacidad de cada nivel de los resúmenes.
+    seed : int (optional)
+        Semilla de los resúmenes. Cada llave recibe su propio generador
+        derivado de esta semilla, de modo que los errores de grupos
+        distintos no queden correlacionados.
+    """
+
+    def __init__(self, k=256, seed=None):
+        self.k = k
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.sketches = {}
+
+    def _sketch(self, key):
+        if key not in self.sketches:
+            self.sketches[key] = QuantileSketch(self.k, self.seed_sequence.spawn(1)[0])
+        return self.sketches[key]
+
+    def update_frame(self, df, by, columns=None, groups=None):
+        """Agrega un bloque de datos, con los mismos argumentos que
+        'QuantileIndex.from_frame'. El bloque se ordena una sola vez."""
+        index = QuantileIndex.from_frame(df, by, columns, groups)
+        for code, key in enumerate(index.keys):
+            start = index.starts[code]
+            self._sketch(key).update(index.values[start:start + index.counts[code]])
+        return self
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            self._sketch(key).merge(sketch)
+        return self
+
+    def count(self, group, column):
+        return self.sketches[(group, column)].n
+
+    def ecdf(self, group, column):
+        return self.sketches[(group, column)].ecdf()
+
+    def cdf(self, x, group, column):
+        return self.sketches[(group, column)].cdf(x)
+
+    def quantile(self, q, group, column):
+        return self.sketches[(group, column)].quantile(q)
@@ -1,42 +1,71 @@
-import seaborn as sns
-from scipy.stats import circmean
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+from src.eda.circular import is_direction_column
+from src.eda.profiles import calendar_profiles, profile_mean, week_hour_matrix
+from src.utils import lazy_import
 
-numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
+sns = lazy_import('seaborn')
+plt = lazy_import('matplotlib.pyplot')
+mcollections = lazy_import('matplotlib.collections')
+
+MONTH_DAYS = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+def plot_profile_lines(ax, matrix, circular, color, log=False):
+    """Dibuja cada fila de una matriz de perfiles como una línea tenue,
+    todas en una sola LineCollection, y encima el promedio por columna.
+
+    Parameters
+    ----------
+    ax : axes
+        Axes en donde se posicionará el gráfico.
+    matrix : np.array
+        Matriz (perfil, posición), por ejemplo (día, hora).
+    circular : bool
+        Condición para usar el promedio circular, para direcciones.
+    color : color
+        Color de las líneas individuales.
+    log : bool
+        Condición para considerar solo valores positivos en los límites.
+
+    Returns
+    -------
+    None
+    """
+    x = np.arange(matrix.shape[1])
+    x_matrix = np.broadcast_to(x, matrix.shape)
+    # Los NaN cortan las líneas, como en 'plot'.
+    segments = np.stack([x_matrix, matrix], axis=-1)
+    ax.add_collection(mcollections.LineCollection(segments, colors=[color], alpha=0.1, label='_no_legend_'))
+    finite = np.isfinite(matrix) & (matrix > 0 if log else True)
+    if finite.any():
+        ax.update_datalim(np.column_stack([x_matrix[finite], matrix[finite]]))
+    ax.autoscale_view()
+    ax.plot(x, profile_mean(matrix, circular), color="blue", label="mean")
+
+def window_rows(days, start, end):
+    rows = np.ones(len(days), dtype=bool)
+    if start is not None:
+        rows &= days >= pd.Timestamp(start)
+    if end is not None:
+        rows &= days < pd.Timestamp(end)
+    return rows
+
+def plot_por_mes(timeseries, col, title, log = False, circular = None, start = None, end = None):
+    if circular is None:
+        circular = is_direction_column(col)
+    day_matrix, days = calendar_profiles(timeseries[col], circular)['day']
+    rows = window_rows(days, start, end)
+    day_matrix, days = day_matrix[rows], days[rows]
 
-def plot_por_mes(timeseries, col, title, log = False, circular = False):
-    # Plot the electricity demand for each day
     fig, ax = plt.subplots(nrows=2, ncols=3, figsize=[15, 10], sharey=True)
     ax = ax.flatten()
     sns_blue = sns.color_palette(as_cmap=True)[0]
     MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
     for ix, month in enumerate(MONTHS):
-
-        # Plot individual ts
-        daily_ts = []
-        for _, ts in (
-            timeseries[[col, "day_of_month", "month"]]
-            .query(f"month == {ix+1}")
-            .groupby("day_of_month")
-        ):
-            daily_ts.append(ts.reset_index()[col])
-            ts.reset_index()[col].plot(
-                alpha=0.1, ax=ax[ix], color=sns_blue, label="_no_legend_"
-            )
-            ax[ix].set_xticks(np.arange(0, len(ts) + 1, 8))
-            ax[ix].set_title(month)
-
-        # Plot the mean ts
-        if not circular:
-            pd.concat(daily_ts, axis=1).mean(axis=1).plot(
-                ax=ax[ix], color="blue", label="mean", legend=True
-            )
-        else:
-            pd.concat(daily_ts, axis=1).apply(lambda x: circmean(x),axis=1).plot(
-                ax=ax[ix], color="blue", label="mean", legend=True
-            )
+        # Un perfil horario por cada día del mes
+        plot_profile_lines(ax[ix], day_matrix[days.month == ix + 1], circular, sns_blue, log)
+        ax[ix].set_xticks(np.arange(0, 25, 8))
+        ax[ix].set_title(month)
         ax[ix].legend(loc="upper left", frameon=False)
         if log:
             ax[ix].set_yscale('log')
@@ -49,23 +78,21 @@ def plot_por_mes(timeseries, col, title, log = False, circular = False):
     fig.text(0.5, -0.02, "Hora del día", ha="center")
     fig.text(-0.02, 0.5, "Concentración", va="center", rotation="vertical")
     fig.suptitle("{} medidas cada día según el mes".format(title))
-    #fig.delaxes(ax[-1])
     fig.tight_layout()
     plt.show()
 
-def plot_por_semana(timeseries, col, title, log = False, circular = False):
+def plot_por_semana(timeseries, col, title, log = False, circular = None, start = None, end = None):
+    if circular is None:
+        circular = is_direction_column(col)
+    day_matrix, days = calendar_profiles(timeseries[col], circular)['day']
+    rows = window_rows(days, start, end)
+    week_matrix, _ = week_hour_matrix(day_matrix[rows], days[rows])
+
     fig, ax = plt.subplots(figsize=[20, 10])
-    weekly_ts = []
-    sns_blue = sns.color_palette(as_cmap=True)
+    sns_blue = sns.color_palette(as_cmap=True)[0]
     DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    for week, ts in timeseries.groupby("week"):
-        weekly_ts.append(ts.reset_index()[col])
-        ts.reset_index()[col].plot(alpha=0.1, ax=ax, label="_no_legend_", color=sns_blue)
-        plt.xticks(ticks=np.arange(0, 167, 24), labels=DAYS)
-
-    pd.concat(weekly_ts, axis=1).mean(axis=1).plot(
-        ax=ax, color="blue", label="mean", legend=True
-    )
+    plot_profile_lines(ax, week_matrix, circular, sns_blue, log)
+    ax.set_xticks(np.arange(0, 167, 24), labels=DAYS)
 
     ax.set_ylabel("Concentración")
     ax.set_title("{} medidas cada día de la semana".format(title))
@@ -77,21 +104,16 @@ def plot_por_semana(timeseries, col, title, log = False, circular = False):
     plt.tight_layout()
     plt.show()
     
-def plot_por_ano(timeseries, col, title, circular = False):
+def plot_por_ano(timeseries, col, title, circular = None):
+    if circular is None:
+        circular = is_direction_column(col)
+    year_matrix, _ = calendar_profiles(timeseries[col], circular)['year']
+
     fig, ax = plt.subplots(figsize=[20, 10])
-    yearly_ts = []
-    sns_blue = sns.color_palette(as_cmap=True)
+    sns_blue = sns.color_palette(as_cmap=True)[0]
     MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    for month, ts in timeseries.select_dtypes(include=numerics).groupby("year"):
-        ts = ts.select_dtypes(include=numerics).groupby(["month","day_of_month"]).mean()
-        #print(ts.reset_index())
-        yearly_ts.append(ts.reset_index()[col])
-        ts.reset_index()[col].plot(alpha=0.1, ax=ax, label="_no_legend_", color=sns_blue)
-        plt.xticks(ticks= [0, 31, 59, 90, 120, 151, 181, 212, 242, 273, 303, 334], labels=MONTHS)
-
-    pd.concat(yearly_ts, axis=1).mean(axis=1).plot(
-        ax=ax, color="blue", label="mean", legend=True
-    )
+    plot_profile_lines(ax, year_matrix, circular, sns_blue)
+    ax.set_xticks(np.cumsum([0] + MONTH_DAYS[:-1]), labels=MONTHS)
 
     ax.set_ylabel("Concentración")
     ax.set_title("{} medidas cada mes".format(title))
@@ -101,27 +123,12 @@ def plot_por_ano(timeseries, col, title, circular = False):
     plt.tight_layout()
     plt.show()
     
-def visualizar_trends(df, col, ano_0, title, log = False, circular = False):
-    timeseries = df.copy()
-    timeseries['Fecha'] = timeseries.index
-    
-    # Filter for first 149 days of 2021.
+def visualizar_trends(df, col, ano_0, title, log = False, circular = None):
+    # Los gráficos por mes y por semana consideran los primeros 180 días
+    # de 'ano_0', y el gráfico por año toda la serie. Los perfiles de la
+    # columna se calculan una sola vez para los tres gráficos.
     start_date = pd.to_datetime("{}-01-01".format(ano_0))
     end_date = start_date + pd.Timedelta("180D")
-    mask = (timeseries["Fecha"] >= start_date) & (timeseries["Fecha"] < end_date)
-    #mask = (timeseries.index >= start_date) & (timeseries.index < end_date)
-    #timeseries_full = timeseries
-    
-    # Resample to hourly
-    
-    # Compute date time variables used later in plotting
-    timeseries["week"] = timeseries.index.isocalendar().week
-    timeseries["day_of_month"] = timeseries.index.day
-    timeseries["month"] = timeseries.index.month
-    timeseries["year"] = timeseries.index.year
-    timeseries_full = timeseries.copy()
-    timeseries = timeseries[mask]
-    timeseries = timeseries.set_index("Fecha").resample("H").sum()
-    plot_por_mes(timeseries, col, title, log = log, circular = circular)
-    plot_por_semana(timeseries, col, title, log = log, circular = circular)
-    plot_por_ano(timeseries_full, col, title, circular =  circular)
\ No newline at end of file
+    plot_por_mes(df, col, title, log = log, circular = circular, start = start_date, end = end_date)
+    plot_por_semana(df, col, title, log = log, circular = circular, start = start_date, end = end_date)
+    plot_por_ano(df, col, title, circular = circular)
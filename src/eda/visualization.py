@@ -1,12 +1,16 @@
 
-import matplotlib.pyplot as plt
-import matplotlib.lines as mlines
-import seaborn as sns
 import pandas as pd
-from src.eda.processing import to_season, daily_stats
+from src.eda.processing import to_season, daily_stats, day_columns
+from src.eda.correlation import best_lags, cross_correlation, lagged_correlation
+from src.eda.quantiles import QuantileIndex
+from src.utils import lazy_import
 import numpy as np
 from math import ceil
 
+plt = lazy_import('matplotlib.pyplot')
+mlines = lazy_import('matplotlib.lines')
+sns = lazy_import('seaborn')
+
 
 def hist_plot(data_df, xlabel_list, **kwargs):
     """Recibe un DataFrame y grafica histogramas de todas sus columnas.
@@ -36,14 +40,15 @@ def hist_plot(data_df, xlabel_list, **kwargs):
     plt.tight_layout(rect=[0, 0, 1, 0.98])
     plt.show()
 
-def conf_matrix(data_df, SO2_only=False, abs=True, ax=None):
+def conf_matrix(data_df, SO2_only=False, abs=True, ax=None, lag=0, method='pearson', cube=None):
     """Recibe un DataFrame y grafica una matriz de correlaciones entre
     sus variables.
 
     Parameters
     ----------
     data_df : pd.DataFrame
-        DataFrame en estudio para calcular correlaciones.
+        DataFrame en estudio para calcular correlaciones. Con 'lag' mayor
+        a 0 debe estar indexado por hora.
     SO2_only : boolean
         Condición para determinar si se grafican solo las correlaciones
         hacia 'SO2', ordenadas de manera descendente.
@@ -52,6 +57,18 @@ def conf_matrix(data_df, SO2_only=False, abs=True, ax=None):
         correlaciones al graficar.
     ax : axes (optional)
         Axes en donde se posicionará el gráfico.
+    lag : int
+        Desfase en horas. Cada fila corresponde a una variable en la hora
+        t y cada columna a una variable en la hora t + lag. Con 0 se usa
+        'DataFrame.corr', con cualquier índice y sin mínimo de pares. Con
+        otros desfases se usa 'lagged_correlation', que requiere un índice
+        horario y deja en blanco los pares con menos de 30 horas válidas.
+    method : str
+        'pearson' o 'spearman'.
+    cube : tuple (optional)
+        Resultado de 'lagged_correlation', para graficar varios desfases
+        sin volver a calcular las correlaciones. En ese caso se ignoran
+        'data_df' y 'method'.
 
     Returns
     -------
@@ -59,10 +76,17 @@ def conf_matrix(data_df, SO2_only=False, abs=True, ax=None):
     """       
     if ax is None:
         ax = plt.gca()
-    data_corr = data_df.corr(method='pearson')
+    if cube is None and lag == 0:
+        # Sin desfase se mantiene el resultado de 'DataFrame.corr'.
+        data_corr = data_df.corr(method=method, numeric_only=True)
+    else:
+        if cube is None:
+            cube = lagged_correlation(data_df, max_lag=lag, method=method)
+        corr, lags, columns = cube
+        data_corr = pd.DataFrame(corr[list(lags).index(lag)], index=columns, columns=columns)
     square = True
     if SO2_only:
-        data_corr = data_corr.loc[['SO2']].T.sort_values('SO2', ascending=False)
+        data_corr = data_corr[['SO2']].sort_values('SO2', ascending=False)
         square = False
     if abs:
         data_corr = data_corr.abs()
@@ -191,9 +215,11 @@ def plot_temp(df_daily, station, labels, type='cumdistr', figsize=(20,80)):
     None
     """      
     metrics = ['min', 'max', 'mean', 'std']
-    columns = df_daily[0][0].columns
-    n_cols = columns.shape[0]
+    # Columnas en el orden de 'daily_stats', sin las columnas de estado.
+    columns = day_columns(list(df_daily[0]))
+    n_cols = len(columns)
     stats_daily = [daily_stats(df) for df in df_daily]
+    indexes = [QuantileIndex.from_stats(df, range(len(metrics)), range(df.shape[2])) for df in stats_daily]
 
     fig = plt.figure(constrained_layout=True, figsize=(20, 5*n_cols))
 
@@ -205,9 +231,9 @@ def plot_temp(df_daily, station, labels, type='cumdistr', figsize=(20,80)):
         # create 1x3 subplots per subfig
         axs = subfig.subplots(nrows=1, ncols=len(metrics))
         for col, ax in enumerate(axs):
-            for df in stats_daily:
+            for df, index in zip(stats_daily, indexes):
                 if type=='cumdistr':
-                    sns.ecdfplot(df[:, col, row], ax=ax)
+                    plot_ecdf(ax, *index.ecdf(col, row))
                 elif type=='hist':
                     ax.hist(df[:, col, row], alpha=0.5, density=True, bins=30)
             # ax.hist(stats_daily2[:, col, row], alpha=0.5, density=True, bins=30)
@@ -223,17 +249,18 @@ def cumdistr_comparison(df_daily, station, columns, x_log=False):
     style = ['-','--']
     colors = sns.color_palette('Paired')
     metrics = ['min', 'max', 'mean', 'std']
-    col_idxs = [df_daily[0][0].columns.tolist().index(col) for col in columns]
+    indexes = [QuantileIndex.from_stats(df, range(len(metrics)), range(df.shape[2])) for df in stats_daily]
+    stats_columns = day_columns(list(df_daily[0]))
+    col_idxs = [stats_columns.index(col) for col in columns]
 
     for jdx, ax in enumerate(axes.ravel()):
-        for idx, df in enumerate(stats_daily):
+        for idx, index in enumerate(indexes):
             for j, i in enumerate(col_idxs):
-                temp = df[:, jdx, i]
-                temp_plot = sns.ecdfplot(temp, ax=ax, linestyle=style[idx], color=colors[j])
+                plot_ecdf(ax, *index.ecdf(jdx, i), linestyle=style[idx], color=colors[j])
                 if x_log:
                     ax.set_xscale('log')
                 ax.set_xlabel(metrics[jdx])
-        first_legend = ax.legend(df_daily[0][0].columns[col_idxs], loc='upper right')
+        first_legend = ax.legend(columns, loc='upper right')
         ax.add_artist(first_legend)
         line1 = mlines.Line2D([], [], color='black', linestyle='-', label='Peak days')
         line2 = mlines.Line2D([], [], color='black', linestyle='--', label='Normal days')                          
@@ -242,20 +269,31 @@ def cumdistr_comparison(df_daily, station, columns, x_log=False):
     plt.tight_layout()
     plt.show()
 
+def plot_ecdf(ax, values, proportions, **kwargs):
+    """Dibuja como escalones una distribución acumulada ya calculada, por
+    ejemplo la que entrega 'QuantileIndex.ecdf', del mismo modo que
+    'sns.ecdfplot'."""
+    if len(values):
+        values, proportions = np.r_[values[0], values], np.r_[0, proportions]
+    return ax.step(values, proportions, where='post', **kwargs)
+
 def cumdistr_comparacion_horaria(df1, df2, df1_label, df2_label, column):
+    """Compara la distribución acumulada de una columna en cada hora del
+    día entre dos DataFrames con una columna 'hour'. Cada DataFrame se
+    ordena una sola vez para todas las horas."""
     fig, axes = plt.subplots(6,4,figsize=(20,30))
+    indexes = [QuantileIndex.from_frame(df, 'hour', [column], groups=range(24)) for df in [df1, df2]]
 
     for idx, ax in enumerate(axes.ravel()):
-        sns.ecdfplot(df1.loc[df1.hour==idx, column], ax=ax)
-        sns.ecdfplot(df2.loc[df2.hour==idx, column], ax=ax)
+        for index in indexes:
+            plot_ecdf(ax, *index.ecdf(idx, column))
         ax.set_title(f'Distribución acumulada \na las {idx}:00 hrs')
         ax.legend([df1_label, df2_label])
     fig.suptitle(f'Comparación de distribución acumulada por hora - {column}', y=0.99)
     plt.tight_layout()
 
 def plot_estabilidad_TDiff(data_df):
-    df_days = np.array([g for n, g in data_df[['T_diff']].groupby(pd.Grouper(freq='D')) if not g.empty], dtype=object)
-    stats_daily = daily_stats(df_days)
+    stats_daily = daily_stats(data_df[['T_diff']])
 
     fig, ax = plt.subplots(figsize=(15,8))
 
@@ -272,10 +310,9 @@ def plot_estabilidad_TDiff(data_df):
     ax.set_title('Distribución de promedios diarios de T_diff')
 
 def plot_estabilidad_SigDir(data_df):
-    df_days = np.array([g for n, g in data_df[['SigDir_10', 'SigDir_20', 'SigDir_40']].groupby(pd.Grouper(freq='D')) if not g.empty], dtype=object)
     fig, ax = plt.subplots(figsize=(15,8))
 
-    stats_daily = daily_stats(df_days) 
+    stats_daily = daily_stats(data_df[['SigDir_10', 'SigDir_20', 'SigDir_40']])
 
     ax.hist(stats_daily[:,0,0],bins=40, alpha=0.5)
     ax.hist(stats_daily[:,0,1],bins=40, alpha=0.5)
@@ -292,11 +329,44 @@ def plot_estabilidad_SigDir(data_df):
     ax.set_xlabel('SigDir mean')
     ax.set_title('Distribución de promedios diarios\nde SigDir a distintas alturas')
 
-def df_convolve(df, column1, column2, estacion):
+def plot_cross_correlation(corr, lags, columns, target, ax=None):
+    """Grafica la correlación cruzada de cada variable con 'target' según
+    el desfase, a partir del resultado de 'cross_correlation'.
+
+    Parameters
+    ----------
+    corr : np.array
+        Arreglo (variable, variable, desfase) de 'cross_correlation'.
+    lags : np.array
+        Desfases en horas.
+    columns : list
+        Nombres de las variables.
+    target : str
+        Variable de referencia. Un máximo en un desfase positivo indica
+        que la variable antecede a 'target'.
+    ax : axes (optional)
+        Axes en donde se posicionará el gráfico.
+
+    Returns
+    -------
+    None
+    """
+    if ax is None:
+        ax = plt.gca()
+    target_idx = columns.index(target)
+    for idx, col in enumerate(columns):
+        if idx != target_idx:
+            ax.plot(lags, corr[idx, target_idx], label=col)
+    ax.axvline(0, color='gray', linestyle='--', linewidth=1)
+    ax.set_xlabel('Desfase [horas]')
+    ax.set_ylabel(f'Correlación con {target}')
+    ax.legend()
+
+def df_convolve(df, column1, column2, estacion, max_lag=168):
     norm_column1 = (df[column1] - df[column1].mean()) / df[column1].std()
     norm_column2 = (df[column2] - df[column2].mean()) / df[column2].std()
-    convolved = np.convolve(norm_column1, norm_column2, mode='same')
-    dates = df.index
+    corr, lags, columns = cross_correlation(df, [column1, column2], max_lag)
+    best = best_lags(corr, lags, columns).loc[(column1, column2)]
 
     fig, ax = plt.subplots(3, figsize=(20,10))
 
@@ -304,8 +374,10 @@ def df_convolve(df, column1, column2, estacion):
     ax[0].set_title(column1)
     ax[1].plot(norm_column2)
     ax[1].set_title(column2)
-    ax[2].plot(dates, convolved)
-    ax[2].set_title('Convolución entre las dos variables')
-    plt.suptitle(f'Comparación con convolución entre {column1} y {column2} - {estacion}')
+    ax[2].plot(lags, corr[0, 1])
+    ax[2].axvline(best['lag'], color='r', linestyle='--')
+    ax[2].set_xlabel('Desfase [horas]')
+    ax[2].set_title(f'Correlación cruzada entre las dos variables (máxima en {best["lag"]:.0f} horas: {best["corr"]:.2f})')
+    plt.suptitle(f'Comparación con correlación cruzada entre {column1} y {column2} - {estacion}')
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()
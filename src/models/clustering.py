@@ -1,9 +1,11 @@
 from time import time
-from tslearn.preprocessing import TimeSeriesScalerMeanVariance
-from sklearn import metrics
 
 
 def bench_k_means(kmeans, name, data, n_clusters):
+    # tslearn y sklearn tardan en importarse, por lo que se cargan solo al usarse.
+    from tslearn.preprocessing import TimeSeriesScalerMeanVariance
+    from sklearn import metrics
+
     t0 = time()
     data = TimeSeriesScalerMeanVariance().fit_transform(data)
     clustered = kmeans.fit_predict(data)
@@ -1,3 +1,4 @@
+import importlib
 from pathlib import Path
 
 def get_project_root():
@@ -8,4 +9,44 @@ def get_project_root():
     Path
         objeto Path con el 'path' del proyecto.
     """        
-    return Path(__file__).parent.parent
\ No newline at end of file
+    return Path(__file__).parent.parent
+
+
+class LazyModule:
+    """Módulo que se importa recién al acceder a alguno de sus atributos.
+
+    Parameters
+    ----------
+    name : str
+        Nombre completo del módulo, por ejemplo 'matplotlib.pyplot'.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f"<LazyModule '{self._name}'>"
+
+
+def lazy_import(name):
+    """Entrega un módulo cuya importación se posterga hasta su primer uso,
+    para que importar funciones de graficación o modelos no cargue
+    matplotlib, seaborn o scipy si no se utilizan.
+
+    Parameters
+    ----------
+    name : str
+        Nombre completo del módulo.
+
+    Returns
+    -------
+    LazyModule
+        Módulo a importar en su primer uso.
+    """
+    return LazyModule(name)
@@ -1,11 +1,16 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from src.utils import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
 
 
 def weekly_cluster_distribution(y_pred, df_list):
-    
-    days_of_week = np.array([df.index[0].day_of_week for df in df_list])
+    # También acepta el DatetimeIndex de días que entrega 'daily_tensor'.
+    if isinstance(df_list, pd.DatetimeIndex):
+        days_of_week = np.asarray(df_list.day_of_week)
+    else:
+        days_of_week = np.array([df.index[0].day_of_week for df in df_list])
     n_cluster, clust_counts = np.unique(y_pred, return_counts=True)
     print(f"Clusters / N° elements: {list(zip(n_cluster,clust_counts))}")
     clusters = []
@@ -55,19 +60,25 @@ def cluster_distribution(labels, normalize=False, ax=None):
     ax.set_ylabel("N° días")
 
 def plot_series_by_cluster(labels, ts_list, cluster_center, centers=False):
+    labels = np.asarray(labels)
     n_cluster = len(set(labels))
     n_dim = ts_list[0].shape[-1]
-    fig, axs = plt.subplots(nrows=n_cluster, ncols=n_dim,figsize=(18,5*n_cluster),sharex=True)
-    if n_dim ==1:
-        axs = [axs]
-    for idx, ts in enumerate(ts_list):
-        for i, col in enumerate(ts):
-            ts_copy = ts[col].copy()
-            ts_copy.index = ts_copy.index.strftime("%H:%M")
-            axs[labels[idx]].plot(
-                                ts_copy,
-                                color="gray",
-                                alpha=0.4,)
+    fig, axs = plt.subplots(nrows=n_cluster, ncols=n_dim,figsize=(18,5*n_cluster),sharex=True, squeeze=False)
+    hours = pd.date_range(start = "00:00",freq=pd.Timedelta(hours=1), periods=24).strftime("%H:%M")
+    if isinstance(ts_list, np.ndarray) and ts_list.ndim == 3:
+        # Arreglo (día, hora, variable) como el que entrega 'daily_tensor'.
+        for dim in range(n_dim):
+            for cluster in set(labels):
+                axs[cluster, dim].plot(hours, ts_list[labels == cluster, :, dim].T, color="gray", alpha=0.4)
+    else:
+        for idx, ts in enumerate(ts_list):
+            for i, col in enumerate(ts):
+                ts_copy = ts[col].copy()
+                ts_copy.index = ts_copy.index.strftime("%H:%M")
+                axs[labels[idx], i].plot(
+                                    ts_copy,
+                                    color="gray",
+                                    alpha=0.4,)
 
     for cluster in set(labels):
         for dim in range(n_dim):